@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Post-download checks, run on a small worker pool. Files are hashed in fixed
+# size chunks so memory use does not grow with file size. Every verified file
+# is remembered by SHA-256 so a later download with the same content is
+# reported as a duplicate and can be replaced by a hard link. The indexed file
+# may have changed since: it only counts as a duplicate while its size and
+# mtime still match the index, and it is always re-hashed before linking.
+
+CHUNK_SIZE = 1024 * 1024
+WORKERS = 2
+ALGORITHMS_BY_LENGTH = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+HEX_DIGITS = set("0123456789abcdef")
+
+
+def parse_expected(text):
+    """Parse "abc123…" or "sha256:abc123…" into (algorithm, hex digest)."""
+    text = text.strip().lower().replace(" ", "")
+    algorithm, _, digest = text.rpartition(":")
+    algorithm = algorithm.replace("-", "")
+    if not digest or not set(digest) <= HEX_DIGITS or len(digest) not in ALGORITHMS_BY_LENGTH:
+        raise ValueError("not a hex checksum")
+    if algorithm and ALGORITHMS_BY_LENGTH[len(digest)] != algorithm:
+        raise ValueError(f"{algorithm} digests are not {len(digest)} characters long")
+    return ALGORITHMS_BY_LENGTH[len(digest)], digest
+
+
+def hash_file(path, algorithms=("sha256",)):
+    """Hash path with every algorithm in one streaming pass; return {name: hexdigest}."""
+    hashers = {name: hashlib.new(name) for name in set(algorithms)}
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            for h in hashers.values():
+                h.update(view[:n])
+    return {name: h.hexdigest() for name, h in hashers.items()}
+
+
+class DownloadVerifier:
+    def __init__(self, index_path, workers=WORKERS):
+        self.index_path = index_path
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)  # sha256 -> {path, size, mtime}
+        except Exception:
+            self.index = {}
+
+    def save_index(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f)
+        except Exception:
+            pass
+
+    def verify(self, path, expected=None, hardlink=False):
+        """Hash, check and deduplicate one file; runs on a worker thread."""
+        result = {"sha256": None, "match": None, "duplicate_of": None, "linked": False, "error": None}
+        algorithms = ["sha256"] + ([expected[0]] if expected else [])
+        try:
+            digests = hash_file(path, algorithms)
+        except OSError as e:
+            result["error"] = str(e)
+            return result
+        sha256 = result["sha256"] = digests["sha256"]
+        if expected:
+            result["match"] = digests[expected[0]] == expected[1]
+        with self.lock:
+            entry = self.index.get(sha256)
+        if isinstance(entry, dict) and not same_file(entry["path"], path) \
+                and self.still_matches(entry, sha256, rehash=hardlink):
+            result["duplicate_of"] = entry["path"]
+        else:
+            try:
+                current = file_entry(path)
+            except OSError:
+                current = None
+            if current:
+                with self.lock:
+                    self.index[sha256] = current
+                    self.save_index()
+        if result["duplicate_of"] and hardlink:
+            result["linked"] = replace_with_link(result["duplicate_of"], path)
+        return result
+
+    def still_matches(self, entry, sha256, rehash=False):
+        """Check that the indexed file still holds sha256, refreshing its size and mtime."""
+        try:
+            current = file_entry(entry["path"])
+        except OSError:
+            return False
+        unchanged = current["size"] == entry.get("size") and current["mtime"] == entry.get("mtime")
+        if unchanged and not rehash:
+            return True
+        try:
+            if hash_file(entry["path"])["sha256"] != sha256:
+                return False
+        except OSError:
+            return False
+        if not unchanged:
+            with self.lock:
+                self.index[sha256] = current
+                self.save_index()
+        return True
+
+
+def file_entry(path):
+    st = os.stat(path)
+    return {"path": path, "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def same_file(a, b):
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def replace_with_link(existing, path):
+    tmp = path + ".hao-link"
+    try:
+        os.link(existing, tmp)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def describe(result):
+    """One-line summary of a verify() result for the downloads view."""
+    if result["error"]:
+        return f"Verification failed: {result['error']}"
+    parts = [f"SHA-256 {result['sha256'][:16]}…"]
+    if result["match"] is True:
+        parts.append("checksum OK")
+    elif result["match"] is False:
+        parts.append("CHECKSUM MISMATCH")
+    if result["duplicate_of"]:
+        verb = "hard-linked to" if result["linked"] else "duplicate of"
+        parts.append(f"{verb} {result['duplicate_of']}")
+    return ", ".join(parts)
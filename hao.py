@@ -3,24 +3,45 @@ import os
 import json
 import platform
 import ctypes
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from PyQt5.QtCore import QUrl, Qt, QTimer, QRect
+from PyQt5.QtCore import (
+    QUrl, QUrlQuery, Qt, QTimer, QRect, QBuffer, QByteArray, QIODevice, QObject, pyqtSignal
+)
 from PyQt5.QtGui import (
     QIcon, QPalette, QColor, QDesktopServices, QGuiApplication,
-    QFontMetrics, QPainter
+    QFontMetrics, QPainter, QStandardItemModel, QStandardItem
 )
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLineEdit, QToolBar, QTabWidget, QWidget,
     QVBoxLayout, QAction, QHBoxLayout, QSizePolicy, QStyleFactory, QStyle,
     QMenu, QToolButton, QMessageBox, QTabBar, QStyleOptionTab,
-    QDialog, QLabel, QListWidget, QPushButton, QProgressBar
+    QDialog, QLabel, QListWidget, QPushButton, QProgressBar, QCompleter, QListWidgetItem
 )
 from PyQt5.QtWebEngineWidgets import (
     QWebEngineView, QWebEnginePage, QWebEngineFullScreenRequest, QWebEngineSettings,
-    QWebEngineDownloadItem
+    QWebEngineDownloadItem, QWebEngineProfile, QWebEngineScript
+)
+from PyQt5.QtWebEngineCore import (
+    QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
 )
 from PyQt5.QtWidgets import QFileDialog
 from style import apply_fusion_style, get_palette
+import pages
+from userscripts import UserScriptManager
+from netlog import TabNetworkLog, NetworkLogInterceptor, RESOURCE_TIMING_JS, timing_buffer_script
+from siterules import SiteRules, SiteZoom, RULE_KEYS
+from renderwatch import RendererWatchdog, POLICIES as RECOVERY_POLICIES
+from stallwatch import StallWatchdog, HEARTBEAT_MS as STALL_HEARTBEAT_MS
+import headless
+from pageindex import PageIndex
+from offline import OfflineArchive
+from dlverify import DownloadVerifier, parse_expected, describe as describe_verification
+from verticaltabs import TabTreeModel, VerticalTabStrip
+from suggest import SuggestionProvider, SUGGEST_ENDPOINTS
+import replayproxy
 
 # --- DPI/Scaling Awareness ---
 try:
@@ -31,6 +52,36 @@ except Exception:
 QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
 QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
+# --- Headless Render Mode ---
+# Parsed once with the same parser that runs the render, so every spelling it
+# accepts (e.g. --headless-render=urls.txt) selects headless mode.
+render_options = headless.parse_args(sys.argv[1:])
+HEADLESS_RENDER = render_options.url_list is not None
+if HEADLESS_RENDER:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# --- Record/Replay Proxy (Chromium flags must be set before QApplication) ---
+replay_options = replayproxy.parse_args(sys.argv[1:])
+replay_proxy = None
+if replay_options.record or replay_options.replay:
+    replay_proxy = replayproxy.ReplayProxy(
+        replay_options.record or replay_options.replay,
+        "record" if replay_options.record else "replay",
+        replay_options.replay_latency,
+        replay_options.replay_bandwidth,
+    )
+    replay_proxy.start()
+    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = " ".join(
+        [os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", "")] + replay_proxy.chromium_flags()).strip()
+
+# --- Internal Scheme Registration (must happen before QApplication) ---
+INTERNAL_SCHEME = "hao"
+NEWTAB_URL = "hao://newtab"
+hao_scheme = QWebEngineUrlScheme(INTERNAL_SCHEME.encode())
+hao_scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+hao_scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalScheme)
+QWebEngineUrlScheme.registerScheme(hao_scheme)
+
 app = QApplication(sys.argv)
 primary_screen = QGuiApplication.primaryScreen()
 system_dpi = primary_screen.logicalDotsPerInch() if primary_screen else 96
@@ -38,6 +89,22 @@ system_scaling = system_dpi / 96.0 if system_dpi else 1.0
 
 apply_fusion_style(app)
 
+# --- Background Work ---
+class MainThreadDispatcher(QObject):
+    call = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.call.connect(lambda fn: fn())
+
+dispatcher = MainThreadDispatcher()
+
+def run_in_background(executor, fn, done):
+    """Run fn on executor and call done(future) back on the GUI thread."""
+    future = executor.submit(fn)
+    future.add_done_callback(lambda f: dispatcher.call.emit(lambda: done(f)))
+    return future
+
 def get_resource_path(filename):
     """Get the absolute path to a resource file."""
     if hasattr(sys, '_MEIPASS'):
@@ -62,25 +129,55 @@ SEARCH_ENGINES = {
     "DuckDuckGo": "https://duckduckgo.com/?q={}",
 }
 SETTINGS_FILE = os.path.join(os.path.expanduser("~"), ".hao_browser_settings.json")
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".hao_browser")
+FAVICON_DIR = os.path.join(DATA_DIR, "favicons")
+SCRIPTS_DIR = os.path.join(DATA_DIR, "scripts")
+SITE_RULES_FILE = os.path.join(DATA_DIR, "site_rules.json")
+SITE_ZOOM_FILE = os.path.join(DATA_DIR, "site_zoom.json")
+RENDERER_STATS_FILE = os.path.join(DATA_DIR, "renderer_stats.json")
+STALL_LOG_FILE = os.path.join(DATA_DIR, "stalls.log")
+PAGE_INDEX_FILE = os.path.join(DATA_DIR, "page_index.db")
+OFFLINE_DIR = os.path.join(DATA_DIR, "offline")
+DOWNLOAD_HASHES_FILE = os.path.join(DATA_DIR, "download_hashes.json")
 DEFAULTS = {
     "search_engine": "Bing",
-    "homepage": "https://www.msn.com",
-    "newtab": "https://www.msn.com",
+    "homepage": NEWTAB_URL,
+    "newtab": NEWTAB_URL,
     "theme": "System",
     "region": "US",
     "activation_key": "",
     "history": [],
     "browser_zoom": 100,
+    "data_saver": False,
+    "renderer_recovery": "Reload",
+    "index_page_content": False,
+    "index_excluded_hosts": [],
+    "hardlink_duplicate_downloads": False,
+    "vertical_tabs": False,
+    "search_suggestions": True,
 }
+# The old built-in homepage/new tab page. save_settings() runs on every
+# navigation, so nearly every existing settings file stores it without the
+# user ever having chosen it.
+LEGACY_DEFAULT_PAGES = {"https://www.msn.com", "https://www.msn.com/"}
 activation_key = ""
 history = []
 browser_zoom = DEFAULTS["browser_zoom"]
+data_saver = DEFAULTS["data_saver"]
+renderer_recovery = DEFAULTS["renderer_recovery"]
+index_page_content = DEFAULTS["index_page_content"]
+index_excluded_hosts = DEFAULTS["index_excluded_hosts"]
+page_index = None
+hardlink_duplicate_downloads = DEFAULTS["hardlink_duplicate_downloads"]
+vertical_tabs = DEFAULTS["vertical_tabs"]
+search_suggestions = DEFAULTS["search_suggestions"]
 
-downloads = []  # List of dicts: {item, name, path, progress, status}
+downloads = []  # List of dicts: {item, name, path, progress, status, expected, verify}
+downloads_view_refreshers = []  # Callbacks of the open downloads dialog
 
 # --- Settings Persistence ---
 def load_settings():
-    global default_search_engine, default_homepage, default_newtab, default_theme, default_region, activation_key, history
+    global default_search_engine, default_homepage, default_newtab, default_theme, default_region, activation_key, history, browser_zoom, data_saver, renderer_recovery, index_page_content, index_excluded_hosts, hardlink_duplicate_downloads, vertical_tabs, search_suggestions
     try:
         with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -92,6 +189,17 @@ def load_settings():
             activation_key = data.get("activation_key", DEFAULTS["activation_key"])
             history = data.get("history", [])
             browser_zoom = data.get("browser_zoom", DEFAULTS["browser_zoom"])
+            data_saver = data.get("data_saver", DEFAULTS["data_saver"])
+            renderer_recovery = data.get("renderer_recovery", DEFAULTS["renderer_recovery"])
+            index_page_content = data.get("index_page_content", DEFAULTS["index_page_content"])
+            index_excluded_hosts = data.get("index_excluded_hosts", DEFAULTS["index_excluded_hosts"])
+            hardlink_duplicate_downloads = data.get("hardlink_duplicate_downloads", DEFAULTS["hardlink_duplicate_downloads"])
+            vertical_tabs = data.get("vertical_tabs", DEFAULTS["vertical_tabs"])
+            search_suggestions = data.get("search_suggestions", DEFAULTS["search_suggestions"])
+            if default_homepage in LEGACY_DEFAULT_PAGES:
+                default_homepage = DEFAULTS["homepage"]
+            if default_newtab in LEGACY_DEFAULT_PAGES:
+                default_newtab = DEFAULTS["newtab"]
     except Exception:
         default_search_engine = DEFAULTS["search_engine"]
         default_homepage = DEFAULTS["homepage"]
@@ -101,6 +209,13 @@ def load_settings():
         activation_key = DEFAULTS["activation_key"]
         history = []
         browser_zoom = DEFAULTS["browser_zoom"]
+        data_saver = DEFAULTS["data_saver"]
+        renderer_recovery = DEFAULTS["renderer_recovery"]
+        index_page_content = DEFAULTS["index_page_content"]
+        index_excluded_hosts = DEFAULTS["index_excluded_hosts"]
+        hardlink_duplicate_downloads = DEFAULTS["hardlink_duplicate_downloads"]
+        vertical_tabs = DEFAULTS["vertical_tabs"]
+        search_suggestions = DEFAULTS["search_suggestions"]
 
 def save_settings():
     try:
@@ -114,6 +229,13 @@ def save_settings():
                 "activation_key": activation_key,
                 "history": history[-200:],
                 "browser_zoom": browser_zoom,
+                "data_saver": data_saver,
+                "renderer_recovery": renderer_recovery,
+                "index_page_content": index_page_content,
+                "index_excluded_hosts": index_excluded_hosts,
+                "hardlink_duplicate_downloads": hardlink_duplicate_downloads,
+                "vertical_tabs": vertical_tabs,
+                "search_suggestions": search_suggestions,
             }, f)
     except Exception:
         pass
@@ -175,6 +297,12 @@ url_bar = QLineEdit()
 url_bar.setPlaceholderText("Search or enter address and press Enter…")
 url_bar.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
 bar_layout.addWidget(url_bar)
+address_model = QStandardItemModel()
+address_completer = QCompleter(address_model, url_bar)
+address_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+address_completer.setCompletionRole(Qt.UserRole)
+address_completer.setMaxVisibleItems(12)
+url_bar.setCompleter(address_completer)
 bar_container.setLayout(bar_layout)
 toolbar.addWidget(bar_container)
 
@@ -195,6 +323,14 @@ menu_button.setPopupMode(QToolButton.InstantPopup)
 menu = QMenu()
 settings_action = QAction("Settings", window)
 history_action = QAction("History", window)
+user_scripts_action = QAction("User Scripts", window)
+network_log_action = QAction("Network Log", window)
+data_saver_action = QAction("Data Saver", window, checkable=True)
+vertical_tabs_action = QAction("Vertical Tabs", window, checkable=True)
+site_rules_action = QAction("Site Rules", window)
+renderer_health_action = QAction("Renderer Health", window)
+save_offline_action = QAction("Save Page Offline", window)
+offline_pages_action = QAction("Offline Pages", window)
 about_action = QAction("About", window)
 zoom_menu = QMenu("Website Zoom", window)
 zoom_levels = [50, 75, 100, 125, 150, 200]
@@ -202,9 +338,21 @@ zoom_actions = []
 def set_zoom(level):
     browser = tabs.currentWidget()
     if isinstance(browser, QWebEngineView):
-        browser.setZoomFactor(level / 100.0)
-        for act, zl in zip(zoom_actions, zoom_levels):
-            act.setChecked(zl == level)
+        host = browser.url().host()
+        if host and not is_internal_url(browser.url().toString()):
+            site_zoom.set(host, level, browser_zoom)
+            for i in range(tabs.count()):
+                widget = tabs.widget(i)
+                if isinstance(widget, QWebEngineView) and widget.url().host() == host:
+                    widget.setZoomFactor(level / 100.0)
+        else:
+            browser.setZoomFactor(level / 100.0)
+        sync_zoom_menu(browser)
+
+def sync_zoom_menu(browser):
+    level = round(browser.zoomFactor() * 100)
+    for act, zl in zip(zoom_actions, zoom_levels):
+        act.setChecked(zl == level)
 for zl in zoom_levels:
     act = QAction(f"{zl}%", window, checkable=True)
     act.triggered.connect(lambda checked, zl=zl: set_zoom(zl))
@@ -212,8 +360,16 @@ for zl in zoom_levels:
     zoom_actions.append(act)
 zoom_actions[2].setChecked(True)
 menu.addMenu(zoom_menu)
+menu.addAction(data_saver_action)
+menu.addAction(vertical_tabs_action)
+menu.addAction(site_rules_action)
 menu.addAction(settings_action)
 menu.addAction(history_action)
+menu.addAction(save_offline_action)
+menu.addAction(offline_pages_action)
+menu.addAction(user_scripts_action)
+menu.addAction(network_log_action)
+menu.addAction(renderer_health_action)
 menu.addAction(about_action)
 downloads_action = QAction("Downloads", window)
 downloads_action.setToolTip("View Downloads")
@@ -227,19 +383,24 @@ copilot_action.setIconText("AI")
 toolbar.insertAction(menu_button.defaultAction() if hasattr(menu_button, 'defaultAction') else None, copilot_action)
 
 # --- Download List Dialog ---
+def download_text(d):
+    text = f"{d['name']}\n{d['status']}"
+    if d.get('verify'):
+        text += f"\n{d['verify']}"
+    return text
+
 def show_downloads():
     dialog = QDialog(window)
     dialog.setWindowTitle("Downloads")
     dialog.resize(520, 340)
     layout = QVBoxLayout()
     list_widget = QListWidget()
-    progress_bars = []s
+    progress_bars = []
     open_btns = []
     open_folder_btns = []
     cancel_btns = []
     for i, d in enumerate(downloads):
-        item_text = f"{d['name']}\n{d['status']}"
-        list_widget.addItem(item_text)
+        list_widget.addItem(download_text(d))
     layout.addWidget(QLabel("Download List:"))
     layout.addWidget(list_widget)
     # Add progress bars, open buttons, and cancel buttons below the list
@@ -275,16 +436,37 @@ def show_downloads():
                 d['progress'] = 0
                 cancel_btn.setEnabled(False)
                 bar.setValue(0)
-                list_widget.item(idx).setText(f"{d['name']}\n{d['status']}")
+                list_widget.item(idx).setText(download_text(d))
         cancel_btn.clicked.connect(cancel_download)
         cancel_btns.append(cancel_btn)
         h.addWidget(cancel_btn)
+        # --- Verify Button ---
+        verify_btn = QPushButton("Verify…")
+        def ask_checksum(d=d):
+            from PyQt5.QtWidgets import QInputDialog
+            text, ok = QInputDialog.getText(dialog, "Verify Download", "Expected checksum (MD5, SHA-1, SHA-256 or SHA-512):")
+            if not ok or not text.strip():
+                return
+            try:
+                d['expected'] = parse_expected(text)
+            except ValueError as e:
+                QMessageBox.warning(dialog, "Verify Download", f"Invalid checksum: {e}")
+                return
+            if d['status'] == "Completed":
+                verify_download(d)
+        verify_btn.clicked.connect(ask_checksum)
+        h.addWidget(verify_btn)
         layout.addLayout(h)
+    def refresh():
+        for idx, d in enumerate(downloads[:list_widget.count()]):
+            list_widget.item(idx).setText(download_text(d))
+    downloads_view_refreshers.append(refresh)
     close_btn = QPushButton("Close")
     close_btn.clicked.connect(dialog.accept)
     layout.addWidget(close_btn)
     dialog.setLayout(layout)
     dialog.exec_()
+    downloads_view_refreshers.remove(refresh)
 
 # --- Tab Widget and MarqueeTabBar ---
 class MarqueeTabBar(QTabBar):
@@ -377,20 +559,282 @@ tabs.setTabsClosable(True)
 tabs.setTabPosition(QTabWidget.South)
 tabs.setTabBar(MarqueeTabBar())
 
+# --- Vertical Tab Strip ---
+tab_tree = TabTreeModel(window)
+vertical_tab_strip = VerticalTabStrip(tab_tree)
+vertical_tab_strip.hide()
+
+def apply_vertical_tabs():
+    vertical_tab_strip.setVisible(vertical_tabs)
+    tabs.tabBar().setVisible(not vertical_tabs)
+    # The marquee repaints every 30ms; no need while the bar is hidden.
+    if vertical_tabs:
+        tabs.tabBar().timer.stop()
+        vertical_tab_strip.select_view(tabs.currentWidget())
+    else:
+        tabs.tabBar().timer.start(30)
+
+def toggle_vertical_tabs(checked):
+    global vertical_tabs
+    vertical_tabs = checked
+    save_settings()
+    apply_vertical_tabs()
+
+tabs_row = QWidget()
+tabs_row_layout = QHBoxLayout()
+tabs_row_layout.setContentsMargins(0, 0, 0, 0)
+tabs_row_layout.setSpacing(0)
+tabs_row_layout.addWidget(vertical_tab_strip)
+tabs_row_layout.addWidget(tabs)
+tabs_row.setLayout(tabs_row_layout)
+
 central_widget = QWidget()
 central_layout = QVBoxLayout()
 central_layout.setContentsMargins(0, 0, 0, 0)
 central_layout.setSpacing(0)
-central_layout.addWidget(tabs)
+central_layout.addWidget(tabs_row)
 central_layout.addWidget(toolbar)
 central_widget.setLayout(central_layout)
 window.setCentralWidget(central_widget)
 
 # --- Custom WebEnginePage ---
 class CustomWebEnginePage(QWebEnginePage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Navigations that never commit (downloads, 204s, cancelled loads)
+        # must not leave the current page with another host's rules.
+        self.urlChanged.connect(lambda _: restore_site_settings(self))
+        self.loadFinished.connect(lambda _: restore_site_settings(self))
+        # Zoom follows the committed URL: urlChanged fires as a navigation
+        # commits, before the new document paints, and Qt keeps the factor
+        # for that document; loadFinished catches navigations that did not commit.
+        self.urlChanged.connect(lambda url: apply_site_zoom(self, url.host()))
+        self.loadFinished.connect(lambda _: apply_site_zoom(self, self.url().host()))
+
     def createWindow(self, _type):
-        new_browser = add_new_tab()
-        return new_browser.page()
+        if HEADLESS_RENDER:
+            return None
+        new_browser = add_new_tab(opener=self.view())
+        return new_browser.page() if new_browser else None
+
+    def acceptNavigationRequest(self, url, _type, isMainFrame):
+        if isMainFrame:
+            apply_site_settings(self, url.host())
+        return super().acceptNavigationRequest(url, _type, isMainFrame)
+
+    # A JS dialog blocks the renderer until the user answers it; keep the
+    # hang watchdog from mistaking that for a hang (beforeunload arrives
+    # through javaScriptConfirm).
+    def javaScriptAlert(self, securityOrigin, msg):
+        renderer_watchdog.dialog_opened(self.view())
+        try:
+            super().javaScriptAlert(securityOrigin, msg)
+        finally:
+            renderer_watchdog.dialog_closed(self.view())
+
+    def javaScriptConfirm(self, securityOrigin, msg):
+        renderer_watchdog.dialog_opened(self.view())
+        try:
+            return super().javaScriptConfirm(securityOrigin, msg)
+        finally:
+            renderer_watchdog.dialog_closed(self.view())
+
+    def javaScriptPrompt(self, securityOrigin, msg, defaultValue):
+        renderer_watchdog.dialog_opened(self.view())
+        try:
+            return super().javaScriptPrompt(securityOrigin, msg, defaultValue)
+        finally:
+            renderer_watchdog.dialog_closed(self.view())
+
+    def javaScriptConsoleMessage(self, level, message, lineNumber, sourceID):
+        if user_scripts.report(message):
+            return
+        super().javaScriptConsoleMessage(level, message, lineNumber, sourceID)
+
+# --- Internal Pages (hao://) ---
+favicon_cache = {}  # host -> PNG bytes
+VALID_HOST_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789.-")
+
+def favicon_path(host):
+    host = host.lower()
+    if not host or host.startswith(".") or not set(host) <= VALID_HOST_CHARS:
+        return None
+    return os.path.join(FAVICON_DIR, host + ".png")
+
+def cache_favicon(host, icon):
+    path = favicon_path(host)
+    if path is None or icon.isNull():
+        return
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    icon.pixmap(32, 32).save(buffer, "PNG")
+    png = bytes(data)
+    if favicon_cache.get(host) == png:
+        return
+    favicon_cache[host] = png
+    try:
+        os.makedirs(FAVICON_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(png)
+    except Exception:
+        pass
+
+def load_favicon(host):
+    if host not in favicon_cache:
+        path = favicon_path(host)
+        try:
+            with open(path, "rb") as f:
+                favicon_cache[host] = f.read()
+        except Exception:
+            return None
+    return favicon_cache[host]
+
+INTERNAL_PAGES = {
+    "newtab": lambda url: pages.render_newtab(history, SEARCH_ENGINES[default_search_engine], is_dark),
+    "history": lambda url: pages.render_history(history, is_dark),
+    "downloads": lambda url: pages.render_downloads(downloads, is_dark),
+    "sadtab": lambda url: pages.render_sad_tab(
+        QUrlQuery(url).queryItemValue("url", QUrl.FullyDecoded),
+        QUrlQuery(url).queryItemValue("reason", QUrl.FullyDecoded), is_dark),
+}
+
+class HaoSchemeHandler(QWebEngineUrlSchemeHandler):
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        page = url.host()
+        if page == "favicon":
+            data = load_favicon(url.path().lstrip("/"))
+            content_type = b"image/png"
+        elif page in INTERNAL_PAGES:
+            data = INTERNAL_PAGES[page](url)
+            content_type = b"text/html"
+        elif page == "archive":
+            page_id, _, digest = url.path().strip("/").partition("/")
+            served = offline_archive.serve(page_id, digest)
+            data = served[1] if served else None
+            content_type = served[0].encode("ascii") if served else b""
+        else:
+            data = None
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        buffer = QBuffer(job)
+        buffer.setData(data)
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(content_type, buffer)
+
+scheme_handler = HaoSchemeHandler(app)
+QWebEngineProfile.defaultProfile().installUrlSchemeHandler(INTERNAL_SCHEME.encode(), scheme_handler)
+
+# --- User Scripts (registered once on the profile) ---
+user_scripts = UserScriptManager(QWebEngineProfile.defaultProfile(), SCRIPTS_DIR, app)
+QWebEngineProfile.defaultProfile().scripts().insert(timing_buffer_script())
+
+def is_internal_url(url_str):
+    return url_str.startswith(INTERNAL_SCHEME + ":")
+
+# --- Renderer Crash/Hang Watchdog ---
+def sad_tab_url(url_str, reason):
+    url = QUrl(INTERNAL_SCHEME + "://sadtab/")
+    query = QUrlQuery()
+    query.addQueryItem("url", url_str)
+    query.addQueryItem("reason", reason)
+    url.setQuery(query)
+    return url
+
+renderer_watchdog = RendererWatchdog(RENDERER_STATS_FILE, lambda: renderer_recovery, sad_tab_url, is_internal_url, app)
+
+# --- Per-Site Rules and Data Saver ---
+site_rules = SiteRules(SITE_RULES_FILE)
+site_rules_save_timer = QTimer()
+site_rules_save_timer.setSingleShot(True)
+site_rules_save_timer.setInterval(5000)
+site_rules_save_timer.timeout.connect(site_rules.save)
+site_zoom = SiteZoom(SITE_ZOOM_FILE)
+# What an unmatched host gets: the profile defaults as they were at startup
+# (plugins off, autoplay only after a user gesture), not a blanket "allow".
+_default_web_settings = QWebEngineSettings.defaultSettings()
+SITE_DEFAULTS = {
+    "images": _default_web_settings.testAttribute(QWebEngineSettings.AutoLoadImages),
+    "javascript": _default_web_settings.testAttribute(QWebEngineSettings.JavascriptEnabled),
+    "plugins": _default_web_settings.testAttribute(QWebEngineSettings.PluginsEnabled),
+    "autoplay": not _default_web_settings.testAttribute(QWebEngineSettings.PlaybackRequiresUserGesture),
+}
+DEFAULT_RESOURCE_SIZES = {"image": 30000, "script": 60000, "object": 100000}
+
+# Counts what a restricted page would have fetched; runs in the application
+# world so it still works when JavaScript is disabled for the page.
+SKIPPED_RESOURCES_JS = """({
+    image: document.images.length,
+    script: document.querySelectorAll('script[src]').length,
+    object: document.querySelectorAll('embed, object').length
+})"""
+
+def apply_site_settings(page, host):
+    rule = site_rules.effective(host, data_saver, SITE_DEFAULTS)
+    settings = page.settings()
+    settings.setAttribute(QWebEngineSettings.AutoLoadImages, rule["images"])
+    settings.setAttribute(QWebEngineSettings.JavascriptEnabled, rule["javascript"])
+    settings.setAttribute(QWebEngineSettings.PluginsEnabled, rule["plugins"])
+    settings.setAttribute(QWebEngineSettings.PlaybackRequiresUserGesture, not rule["autoplay"])
+    page.site_rule = rule
+    page.site_host = host
+
+def restore_site_settings(page):
+    """Re-apply the rules of the committed URL if a pending navigation changed them."""
+    host = page.url().host()
+    if getattr(page, "site_host", None) != host:
+        apply_site_settings(page, host)
+
+def zoom_for_host(host):
+    return site_zoom.get(host, browser_zoom)
+
+def apply_site_zoom(page, host):
+    factor = zoom_for_host(host) / 100.0
+    if abs(page.zoomFactor() - factor) > 0.001:
+        page.setZoomFactor(factor)
+    if page.view() is not None and tabs.currentWidget() is page.view():
+        sync_zoom_menu(page.view())
+
+def average_resource_size(kind):
+    sizes = []
+    for i in range(tabs.count()):
+        widget = tabs.widget(i)
+        if isinstance(widget, QWebEngineView):
+            sizes += [e["size"] for e in widget.network_log.entries if e["type"] == kind and e["size"]]
+    return sum(sizes) // len(sizes) if sizes else DEFAULT_RESOURCE_SIZES[kind]
+
+def record_data_savings(browser):
+    page = browser.page()
+    rule = getattr(page, "site_rule", None)
+    if not rule:
+        return
+    skipped = [kind for kind, key in (("image", "images"), ("script", "javascript"), ("object", "plugins")) if not rule[key]]
+    if not skipped:
+        return
+    host = browser.url().host()
+    def apply(counts):
+        if not counts or not host:
+            return
+        requests = sum(int(counts.get(kind, 0)) for kind in skipped)
+        size = sum(int(counts.get(kind, 0)) * average_resource_size(kind) for kind in skipped)
+        if requests:
+            site_rules.add_savings(host, requests, size)
+            site_rules_save_timer.start()
+    page.runJavaScript(SKIPPED_RESOURCES_JS, QWebEngineScript.ApplicationWorld, apply)
+
+def apply_site_settings_to_all_tabs():
+    for i in range(tabs.count()):
+        widget = tabs.widget(i)
+        if isinstance(widget, QWebEngineView):
+            apply_site_settings(widget.page(), widget.url().host())
+
+def toggle_data_saver(checked):
+    global data_saver
+    data_saver = checked
+    save_settings()
+    apply_site_settings_to_all_tabs()
 
 # --- Fullscreen Video Support ---
 fullscreen_browser = None
@@ -429,12 +873,79 @@ def handle_fullscreen_request(request):
         fullscreen_old_geometry = None
         fullscreen_old_parent = None
 
+# --- Offline Page Archive ---
+offline_archive = OfflineArchive(OFFLINE_DIR)
+offline_executor = ThreadPoolExecutor(max_workers=1)
+offline_queue = deque()  # browsers waiting for page().save()
+offline_current = None  # the save in progress: {path, url, title}
+OFFLINE_SAVE_TIMEOUT_MS = 60000
+
+def save_page_offline():
+    browser = tabs.currentWidget()
+    if isinstance(browser, QWebEngineView) and browser.url().scheme() in ("http", "https"):
+        offline_queue.append(browser)
+        process_offline_queue()
+
+def process_offline_queue():
+    global offline_current
+    while offline_current is None and offline_queue:
+        browser = offline_queue.popleft()
+        try:
+            fd, path = tempfile.mkstemp(suffix=".mhtml")
+            os.close(fd)
+            job = {"path": path, "url": browser.url().toString(), "title": browser.page().title()}
+            offline_current = job
+            browser.page().save(path, QWebEngineDownloadItem.MimeHtmlSaveFormat)
+        except Exception:
+            offline_current = None
+            continue
+        QTimer.singleShot(OFFLINE_SAVE_TIMEOUT_MS, lambda job=job: finish_offline_save(job) if offline_current is job else None)
+
+def handle_offline_download(download):
+    job = offline_current
+    if job is None or download.savePageFormat() == QWebEngineDownloadItem.UnknownSaveFormat:
+        return False
+    if os.path.normcase(os.path.abspath(download.path())) != os.path.normcase(os.path.abspath(job["path"])):
+        return False
+    def on_finished():
+        if download.state() == QWebEngineDownloadItem.DownloadCompleted:
+            run_in_background(offline_executor,
+                              lambda: offline_archive.import_mhtml(job["path"], job["url"], job["title"]),
+                              lambda future: finish_offline_save(job, future))
+        else:
+            finish_offline_save(job)
+    download.finished.connect(on_finished)
+    download.accept()
+    return True
+
+def finish_offline_save(job, future=None):
+    global offline_current
+    if job.get("finished"):  # the timeout already gave up on this save
+        return
+    job["finished"] = True
+    try:
+        os.remove(job["path"])
+    except OSError:
+        pass
+    if offline_current is job:
+        offline_current = None
+    process_offline_queue()
+    # Start the next save before the message box opens its own event loop.
+    if future is None or future.exception() is not None:
+        QMessageBox.warning(window, "Save Page Offline", f"Could not save this page for offline reading:\n{job['url']}")
+    else:
+        QMessageBox.information(window, "Save Page Offline", f"Saved for offline reading:\n{job['title'] or job['url']}\n\nOpen it from Offline Pages in the menu.")
+
 # --- Download Handling ---
 def handle_download(download: QWebEngineDownloadItem):
+    if download.page() is not None:
+        restore_site_settings(download.page())
+    if handle_offline_download(download):
+        return
     suggested = download.suggestedFileName()
     path, _ = QFileDialog.getSaveFileName(window, "Save File", suggested)
     if path:
-        d = {'item': download, 'name': suggested, 'path': path, 'progress': 0, 'status': 'Downloading'}
+        d = {'item': download, 'name': suggested, 'path': path, 'progress': 0, 'status': 'Downloading', 'expected': None, 'verify': ''}
         downloads.append(d)
         download.setPath(path)
         download.accept()
@@ -443,20 +954,37 @@ def handle_download(download: QWebEngineDownloadItem):
         def on_finished():
             d['progress'] = 100
             d['status'] = 'Completed' if download.state() == QWebEngineDownloadItem.DownloadCompleted else 'Failed'
+            if d['status'] == 'Completed':
+                verify_download(d)
             QMessageBox.information(window, "Download Complete", f"File downloaded to:\n{path}")
         download.downloadProgress.connect(on_progress)
         download.finished.connect(on_finished)
     else:
         download.cancel()
 
+QWebEngineProfile.defaultProfile().downloadRequested.connect(handle_download)
+
+# --- Download Verification ---
+download_verifier = DownloadVerifier(DOWNLOAD_HASHES_FILE)
+
+def verify_download(d):
+    d['verify'] = "Verifying…"
+    refresh_downloads_view()
+    expected, hardlink = d['expected'], hardlink_duplicate_downloads
+    def done(future):
+        try:
+            d['verify'] = describe_verification(future.result())
+        except Exception as e:
+            d['verify'] = f"Verification failed: {e}"
+        refresh_downloads_view()
+    run_in_background(download_verifier.executor, lambda: download_verifier.verify(d['path'], expected, hardlink), done)
+
+def refresh_downloads_view():
+    for refresh in list(downloads_view_refreshers):
+        refresh()
+
 # --- Tab Management ---
-def add_new_tab(url=None):
-    if activation_key != "ILLUM-INATI6-666" and tabs.count() >= 2:
-        QMessageBox.warning(window, "The Product is Unactivated", "Hao Browser 1.0 Beta is Unactivated\n\nPlease activate the browser with genuine hao key to open more than 2 tabs.")
-        return None
-    browser = QWebEngineView()
-    browser.setPage(CustomWebEnginePage(browser))
-    profile = browser.page().profile()
+def configure_profile(profile):
     user_agent = profile.httpUserAgent()
     system = platform.system()
     if system == "Windows":
@@ -468,23 +996,41 @@ def add_new_tab(url=None):
     elif system == "HaoOS":
         user_agent = user_agent.replace("Windows NT 10.0", "HaoOS; AMD Hao 1_0_0")
     profile.setHttpUserAgent(user_agent)
+
+def add_new_tab(url=None, opener=None):
+    if activation_key != "ILLUM-INATI6-666" and tabs.count() >= 2:
+        QMessageBox.warning(window, "The Product is Unactivated", "Hao Browser 1.0 Beta is Unactivated\n\nPlease activate the browser with genuine hao key to open more than 2 tabs.")
+        return None
+    browser = QWebEngineView()
+    browser.setPage(CustomWebEnginePage(browser))
+    browser.network_log = TabNetworkLog()
+    browser.page().setUrlRequestInterceptor(NetworkLogInterceptor(browser.network_log, browser.page()))
+    configure_profile(browser.page().profile())
     browser.setZoomFactor(browser_zoom / 100.0)  # <-- Use selected text size
     browser.page().fullScreenRequested.connect(handle_fullscreen_request)
+    renderer_watchdog.watch(browser)
     browser.setUrl(QUrl(url if url else default_newtab))
+    tab_tree.add_tab(browser, opener)
+    browser.titleChanged.connect(lambda _, browser=browser: tab_tree.refresh(browser))
+    browser.iconChanged.connect(lambda _, browser=browser: tab_tree.refresh(browser))
     i = tabs.addTab(browser, "New Tab")
     tabs.setCurrentIndex(i)
     browser.urlChanged.connect(lambda q, browser=browser: update_urlbar(q, browser))
     browser.loadFinished.connect(lambda _, browser=browser: update_tab_title(browser))
+    browser.loadFinished.connect(lambda _, browser=browser: collect_network_timings(browser))
+    browser.loadFinished.connect(lambda _, browser=browser: record_data_savings(browser))
+    browser.loadFinished.connect(lambda ok, browser=browser: index_page(browser, ok))
     browser.iconChanged.connect(lambda icon, browser=browser: update_tab_icon(browser, icon))
-    # --- Download handler ---
-    browser.page().profile().downloadRequested.connect(handle_download)
     return browser
 
+def display_url(url_str):
+    return "" if url_str == NEWTAB_URL else url_str
+
 def update_urlbar(q, browser):
     if tabs.currentWidget() == browser:
         url_str = q.toString()
-        url_bar.setText(url_str)
-        if url_str and (not history or history[-1] != url_str):
+        url_bar.setText(display_url(url_str))
+        if url_str and not is_internal_url(url_str) and (not history or history[-1] != url_str):
             history.append(url_str)
             save_settings()
 
@@ -493,10 +1039,31 @@ def update_tab_title(browser):
     if i != -1:
         tabs.setTabText(i, browser.page().title())
 
+def collect_network_timings(browser, callback=None):
+    def apply(timings):
+        browser.network_log.apply_timings(timings)
+        if callback:
+            callback()
+    browser.page().runJavaScript(RESOURCE_TIMING_JS, QWebEngineScript.ApplicationWorld, apply)
+
+# --- Page Content Index ---
+def index_page(browser, ok):
+    if not ok or not index_page_content or page_index is None:
+        return
+    url = browser.url()
+    if url.scheme() not in ("http", "https"):
+        return
+    title = browser.page().title()
+    browser.page().toPlainText(lambda text: page_index.add(url.toString(), url.host(), title, text or ""))
+
+def search_pages(text, limit=10):
+    return page_index.search(text, limit) if page_index is not None else []
+
 def update_tab_icon(browser, icon):
     i = tabs.indexOf(browser)
     if i != -1:
         tabs.setTabIcon(i, icon)
+    cache_favicon(browser.url().host(), icon)
 
 # --- UI Dialogs ---
 def show_about():
@@ -525,19 +1092,273 @@ def show_history():
     layout = QVBoxLayout()
     label = QLabel("Browsing History:")
     layout.addWidget(label)
+    search_edit = QLineEdit()
+    search_edit.setPlaceholderText("Search page titles and content…")
+    layout.addWidget(search_edit)
     list_widget = QListWidget()
-    for url in reversed(history):
-        list_widget.addItem(url)
+    def populate(text=""):
+        list_widget.clear()
+        if text.strip():
+            for url, title, snippet in search_pages(text, 50):
+                item = QListWidgetItem(f"{title or url}\n{url}")
+                item.setToolTip(snippet)
+                item.setData(Qt.UserRole, url)
+                list_widget.addItem(item)
+        else:
+            for url in reversed(history):
+                item = QListWidgetItem(url)
+                item.setData(Qt.UserRole, url)
+                list_widget.addItem(item)
+    populate()
+    search_edit.textChanged.connect(populate)
     layout.addWidget(list_widget)
     open_btn = QPushButton("Open")
     layout.addWidget(open_btn)
     def open_selected():
         selected = list_widget.currentItem()
         if selected:
-            url_bar.setText(selected.text())
+            url_bar.setText(selected.data(Qt.UserRole))
             handle_url_or_search()
             dialog.accept()
     open_btn.clicked.connect(open_selected)
+    list_widget.itemDoubleClicked.connect(lambda _: open_selected())
+    dialog.setLayout(layout)
+    dialog.exec_()
+
+def show_user_scripts():
+    dialog = QDialog(window)
+    dialog.setWindowTitle("User Scripts")
+    dialog.resize(520, 340)
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(f"Scripts in {SCRIPTS_DIR} (slowest first):"))
+    list_widget = QListWidget()
+    for script_id, name, injections, total_ms, max_ms in user_scripts.summary():
+        avg_ms = total_ms / injections if injections else 0.0
+        list_widget.addItem(f"{name} ({script_id})\n{injections} injections, avg {avg_ms:.1f} ms, max {max_ms:.1f} ms, total {total_ms:.1f} ms")
+    layout.addWidget(list_widget)
+    h = QHBoxLayout()
+    reload_btn = QPushButton("Reload")
+    def reload_scripts():
+        user_scripts.reload()
+        dialog.accept()
+        show_user_scripts()
+    reload_btn.clicked.connect(reload_scripts)
+    h.addWidget(reload_btn)
+    open_folder_btn = QPushButton("Open Scripts Folder")
+    open_folder_btn.clicked.connect(lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(SCRIPTS_DIR)))
+    h.addWidget(open_folder_btn)
+    close_btn = QPushButton("Close")
+    close_btn.clicked.connect(dialog.accept)
+    h.addWidget(close_btn)
+    layout.addLayout(h)
+    dialog.setLayout(layout)
+    dialog.exec_()
+
+def show_network_log():
+    from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
+    browser = tabs.currentWidget()
+    if not isinstance(browser, QWebEngineView):
+        return
+    log = browser.network_log
+    dialog = QDialog(window)
+    dialog.setWindowTitle("Network Log")
+    dialog.resize(900, 480)
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(f"Requests for {log.page_url or browser.url().toString()}:"))
+    columns = ["URL", "Type", "Duration (ms)", "Size (bytes)", "DNS (ms)", "Connect (ms)", "Wait (ms)"]
+    table = QTableWidget(0, len(columns))
+    table.setHorizontalHeaderLabels(columns)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.setSelectionBehavior(QTableWidget.SelectRows)
+    table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    table.verticalHeader().setVisible(False)
+    def number_item(value, restricted=False):
+        item = QTableWidgetItem()
+        item.setData(Qt.DisplayRole, round(value, 1) if value is not None and value >= 0 else None)
+        if restricted and (value is None or value < 0):
+            item.setToolTip("Not available: cross-origin resource without Timing-Allow-Origin")
+        return item
+    table.horizontalHeader().setSortIndicator(2, Qt.DescendingOrder)
+    def populate():
+        header = table.horizontalHeader()
+        sort_column, sort_order = header.sortIndicatorSection(), header.sortIndicatorOrder()
+        table.setSortingEnabled(False)
+        table.setRowCount(len(log.entries))
+        for row, entry in enumerate(log.entries):
+            timings = entry["timings"] or {}
+            restricted = entry.get("restricted", False)
+            url_item = QTableWidgetItem(entry["url"])
+            url_item.setToolTip(entry["url"])
+            table.setItem(row, 0, url_item)
+            table.setItem(row, 1, QTableWidgetItem(entry["type"]))
+            table.setItem(row, 2, number_item(entry["duration"]))
+            table.setItem(row, 3, number_item(entry["size"], restricted))
+            table.setItem(row, 4, number_item(timings.get("dns"), restricted))
+            table.setItem(row, 5, number_item(timings.get("connect"), restricted))
+            table.setItem(row, 6, number_item(timings.get("wait"), restricted))
+        table.setSortingEnabled(True)
+        table.sortItems(sort_column, sort_order)
+    populate()
+    collect_network_timings(browser, populate)
+    layout.addWidget(table)
+    note = QLabel("Blank sizes and timings are unknown: browsers hide them for cross-origin resources "
+                  "served without a Timing-Allow-Origin header.")
+    note.setWordWrap(True)
+    layout.addWidget(note)
+    # Requests that finish after loadFinished are picked up while the dialog is open.
+    refresh_timer = QTimer(dialog)
+    refresh_timer.timeout.connect(lambda: collect_network_timings(browser, populate) if log.pending() else None)
+    refresh_timer.start(2000)
+    h = QHBoxLayout()
+    refresh_btn = QPushButton("Refresh Timings")
+    refresh_btn.clicked.connect(lambda: collect_network_timings(browser, populate))
+    h.addWidget(refresh_btn)
+    export_btn = QPushButton("Export HAR")
+    def export_har():
+        path, _ = QFileDialog.getSaveFileName(dialog, "Export HAR", "network.har", "HAR files (*.har)")
+        if path:
+            collect_network_timings(browser, lambda: write_har(path))
+    def write_har(path):
+        populate()
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(log.to_har(browser.page().title()), f, indent=1)
+        except Exception as e:
+            QMessageBox.warning(dialog, "Export HAR", f"Could not write HAR file:\n{e}")
+    export_btn.clicked.connect(export_har)
+    h.addWidget(export_btn)
+    close_btn = QPushButton("Close")
+    close_btn.clicked.connect(dialog.accept)
+    h.addWidget(close_btn)
+    layout.addLayout(h)
+    dialog.setLayout(layout)
+    dialog.exec_()
+
+def show_site_rules():
+    from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox
+    dialog = QDialog(window)
+    dialog.setWindowTitle("Site Rules")
+    dialog.resize(640, 480)
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel("Rules (\"example.com\", \"*.example.com\" or \"*\"):"))
+    columns = ["Pattern", "Images", "JavaScript", "Plugins", "Autoplay"]
+    table = QTableWidget(0, len(columns))
+    table.setHorizontalHeaderLabels(columns)
+    table.setEditTriggers(QTableWidget.NoEditTriggers)
+    table.setSelectionBehavior(QTableWidget.SelectRows)
+    table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    table.verticalHeader().setVisible(False)
+    def populate():
+        patterns = sorted(site_rules.rules)
+        table.setRowCount(len(patterns))
+        for row, pattern in enumerate(patterns):
+            rule = site_rules.rules[pattern]
+            table.setItem(row, 0, QTableWidgetItem(pattern))
+            for col, key in enumerate(RULE_KEYS, start=1):
+                table.setItem(row, col, QTableWidgetItem("Default" if key not in rule else "Allow" if rule[key] else "Block"))
+    populate()
+    layout.addWidget(table)
+    h = QHBoxLayout()
+    pattern_edit = QLineEdit()
+    pattern_edit.setPlaceholderText("Host pattern")
+    current = tabs.currentWidget()
+    if isinstance(current, QWebEngineView):
+        pattern_edit.setText(current.url().host())
+    h.addWidget(pattern_edit)
+    checks = {}
+    for key, label in zip(RULE_KEYS, columns[1:]):
+        check = QCheckBox(label)
+        check.setChecked(SITE_DEFAULTS[key])
+        checks[key] = check
+        h.addWidget(check)
+    add_btn = QPushButton("Add / Update")
+    def add_rule():
+        pattern = pattern_edit.text().strip()
+        if pattern:
+            site_rules.set_rule(pattern, {key: check.isChecked() for key, check in checks.items()})
+            populate()
+            apply_site_settings_to_all_tabs()
+    add_btn.clicked.connect(add_rule)
+    h.addWidget(add_btn)
+    layout.addLayout(h)
+    remove_btn = QPushButton("Remove Selected")
+    def remove_rule():
+        row = table.currentRow()
+        if row >= 0:
+            site_rules.remove_rule(table.item(row, 0).text())
+            populate()
+            apply_site_settings_to_all_tabs()
+    remove_btn.clicked.connect(remove_rule)
+    layout.addWidget(remove_btn)
+    layout.addWidget(QLabel("Estimated savings by site:"))
+    savings_list = QListWidget()
+    for host, entry in sorted(site_rules.savings.items(), key=lambda kv: -kv[1]["bytes"]):
+        savings_list.addItem(f"{host}: {entry['requests']} requests skipped, ~{entry['bytes'] / 1024:.0f} KB saved")
+    layout.addWidget(savings_list)
+    close_btn = QPushButton("Close")
+    close_btn.clicked.connect(dialog.accept)
+    layout.addWidget(close_btn)
+    dialog.setLayout(layout)
+    dialog.exec_()
+
+def show_renderer_health():
+    dialog = QDialog(window)
+    dialog.setWindowTitle("Renderer Health")
+    dialog.resize(480, 340)
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel("Renderer crashes and hangs by site:"))
+    list_widget = QListWidget()
+    stats = renderer_watchdog.stats
+    for host, entry in sorted(stats.items(), key=lambda kv: -(kv[1]["crashes"] + kv[1]["hangs"])):
+        list_widget.addItem(f"{host}: {entry['crashes']} crashes, {entry['hangs']} hangs")
+    layout.addWidget(list_widget)
+    close_btn = QPushButton("Close")
+    close_btn.clicked.connect(dialog.accept)
+    layout.addWidget(close_btn)
+    dialog.setLayout(layout)
+    dialog.exec_()
+
+def show_offline_pages():
+    dialog = QDialog(window)
+    dialog.setWindowTitle("Offline Pages")
+    dialog.resize(560, 380)
+    layout = QVBoxLayout()
+    stats_label = QLabel()
+    layout.addWidget(stats_label)
+    list_widget = QListWidget()
+    def populate():
+        list_widget.clear()
+        entries = offline_archive.list_pages()
+        for page_id, page in entries:
+            item = QListWidgetItem(f"{page['title'] or page['url']}\n{page['url']}")
+            item.setData(Qt.UserRole, page_id)
+            list_widget.addItem(item)
+        logical, stored = offline_archive.stats()
+        stats_label.setText(f"{len(entries)} pages, {logical / 1048576:.1f} MB of content stored in {stored / 1048576:.1f} MB")
+    populate()
+    layout.addWidget(list_widget)
+    h = QHBoxLayout()
+    open_btn = QPushButton("Open")
+    def open_selected():
+        selected = list_widget.currentItem()
+        if selected:
+            add_new_tab(f"hao://archive/{selected.data(Qt.UserRole)}/")
+            dialog.accept()
+    open_btn.clicked.connect(open_selected)
+    list_widget.itemDoubleClicked.connect(lambda _: open_selected())
+    h.addWidget(open_btn)
+    delete_btn = QPushButton("Delete")
+    def delete_selected():
+        selected = list_widget.currentItem()
+        if selected:
+            offline_archive.delete(selected.data(Qt.UserRole))
+            populate()
+    delete_btn.clicked.connect(delete_selected)
+    h.addWidget(delete_btn)
+    close_btn = QPushButton("Close")
+    close_btn.clicked.connect(dialog.accept)
+    h.addWidget(close_btn)
+    layout.addLayout(h)
     dialog.setLayout(layout)
     dialog.exec_()
 
@@ -545,10 +1366,12 @@ def apply_text_size_to_all_tabs():
     for i in range(tabs.count()):
         widget = tabs.widget(i)
         if isinstance(widget, QWebEngineView):
-            widget.setZoomFactor(browser_zoom / 100.0)
+            widget.setZoomFactor(zoom_for_host(widget.url().host()) / 100.0)
+    if isinstance(tabs.currentWidget(), QWebEngineView):
+        sync_zoom_menu(tabs.currentWidget())
 
 def show_settings():
-    from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QComboBox, QPushButton, QLineEdit
+    from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QComboBox, QPushButton, QLineEdit, QCheckBox
     dialog = QDialog(window)
     dialog.setWindowTitle("Settings")
     dialog.resize(480, 380)
@@ -853,17 +1676,44 @@ def show_settings():
     layout.addWidget(text_size_label)
     layout.addWidget(text_size_combo)
 
+    recovery_label = QLabel("When a Page Crashes or Hangs:")
+    recovery_combo = QComboBox()
+    recovery_combo.addItems(RECOVERY_POLICIES)
+    recovery_combo.setCurrentText(renderer_recovery)
+    layout.addWidget(recovery_label)
+    layout.addWidget(recovery_combo)
+
+    index_check = QCheckBox("Index page content for history search")
+    index_check.setChecked(index_page_content)
+    layout.addWidget(index_check)
+    index_excluded_edit = QLineEdit(", ".join(index_excluded_hosts))
+    index_excluded_edit.setPlaceholderText("Never index these hosts, e.g. mail.example.com, *.bank.com")
+    layout.addWidget(index_excluded_edit)
+    hardlink_check = QCheckBox("Replace duplicate downloads with hard links")
+    hardlink_check.setChecked(hardlink_duplicate_downloads)
+    layout.addWidget(hardlink_check)
+    suggestions_check = QCheckBox("Show search suggestions in the address bar")
+    suggestions_check.setChecked(search_suggestions)
+    layout.addWidget(suggestions_check)
+
     ok_btn = QPushButton("OK")
     layout.addWidget(ok_btn)
     dialog.setLayout(layout)
     def save_and_close():
-        global default_search_engine, default_homepage, default_newtab, default_theme, default_region, activation_key, browser_zoom
+        global default_search_engine, default_homepage, default_newtab, default_theme, default_region, activation_key, browser_zoom, renderer_recovery, index_page_content, index_excluded_hosts, hardlink_duplicate_downloads, search_suggestions
         default_search_engine = combo.currentText()
         default_homepage = homepage_edit.text().strip() or DEFAULTS["homepage"]
         default_newtab = newtab_edit.text().strip() or DEFAULTS["newtab"]
         default_theme = theme_combo.currentText()
         default_region = region_combo.currentData() or "TH"
         browser_zoom = text_size_combo.currentData()  # <-- Save text size
+        renderer_recovery = recovery_combo.currentText()
+        index_page_content = index_check.isChecked()
+        index_excluded_hosts = [h.strip().lower() for h in index_excluded_edit.text().split(",") if h.strip()]
+        if page_index is not None:
+            page_index.excluded_hosts = set(index_excluded_hosts)
+        hardlink_duplicate_downloads = hardlink_check.isChecked()
+        search_suggestions = suggestions_check.isChecked()
         if activation_edit.isVisible():
             activation_key = activation_edit.text().strip()
         save_settings()
@@ -880,6 +1730,14 @@ def show_settings():
 # --- Signal Connections ---
 settings_action.triggered.connect(show_settings)
 history_action.triggered.connect(show_history)
+user_scripts_action.triggered.connect(show_user_scripts)
+network_log_action.triggered.connect(show_network_log)
+data_saver_action.triggered.connect(toggle_data_saver)
+vertical_tabs_action.triggered.connect(toggle_vertical_tabs)
+site_rules_action.triggered.connect(show_site_rules)
+renderer_health_action.triggered.connect(show_renderer_health)
+save_offline_action.triggered.connect(save_page_offline)
+offline_pages_action.triggered.connect(show_offline_pages)
 about_action.triggered.connect(show_about)
 copilot_action.triggered.connect(show_copilot_dialog)
 downloads_action.triggered.connect(show_downloads)
@@ -887,8 +1745,8 @@ downloads_action.triggered.connect(show_downloads)
 def handle_url_or_search():
     text = url_bar.text().strip()
     if text:
-        if text.startswith("http://") or text.startswith("https://") or "." in text or text.startswith("localhost"):
-            if not text.startswith("http"):
+        if looks_like_url(text):
+            if not text.startswith("http") and not is_internal_url(text):
                 text = "http://" + text
             current_browser = tabs.currentWidget()
             if isinstance(current_browser, QWebEngineView):
@@ -901,11 +1759,75 @@ def handle_url_or_search():
 
 url_bar.returnPressed.connect(handle_url_or_search)
 
+def add_completion(text, value, suggestion=False):
+    item = QStandardItem(text)
+    item.setData(value, Qt.UserRole)
+    item.setData(suggestion, SUGGESTION_ROLE)
+    address_model.appendRow(item)
+
+# --- Search Suggestions ---
+SUGGESTION_ROLE = Qt.UserRole + 1
+suggestion_provider = SuggestionProvider(window)
+
+def suggestion_endpoint():
+    # HAO_SUGGEST_ENDPOINT points suggestions at a local stand-in server.
+    return os.environ.get("HAO_SUGGEST_ENDPOINT") or SUGGEST_ENDPOINTS.get(default_search_engine)
+
+def looks_like_url(text):
+    return is_internal_url(text) or text.startswith("http://") or text.startswith("https://") or "." in text or text.startswith("localhost")
+
+def show_suggestions(query, suggestions):
+    if url_bar.text().strip() != query.strip():
+        return
+    for row in reversed(range(address_model.rowCount())):
+        if address_model.item(row).data(SUGGESTION_ROLE):
+            address_model.removeRow(row)
+    seen = {address_model.item(row).data(Qt.UserRole) for row in range(address_model.rowCount())}
+    for suggestion in suggestions:
+        if suggestion not in seen:
+            seen.add(suggestion)
+            add_completion(f"🔍 {suggestion}", suggestion, suggestion=True)
+    if address_model.rowCount():
+        address_completer.complete()
+
+suggestion_provider.suggestionsReady.connect(show_suggestions)
+
+def update_address_completions(text):
+    address_model.clear()
+    text = text.strip()
+    if not text:
+        suggestion_provider.cancel()
+        return
+    seen = set()
+    lowered = text.lower()
+    for url in reversed(history):
+        if len(seen) >= 4:
+            break
+        if lowered in url.lower() and url not in seen:
+            seen.add(url)
+            add_completion(url, url)
+    for url, title, _ in search_pages(text, 8):
+        if url not in seen:
+            seen.add(url)
+            add_completion(f"{title} — {url}" if title else url, url)
+    if address_model.rowCount():
+        address_completer.complete()
+    endpoint = suggestion_endpoint()
+    if search_suggestions and endpoint and not looks_like_url(text):
+        suggestion_provider.request(endpoint, text)
+    else:
+        suggestion_provider.cancel()
+
+url_bar.textEdited.connect(update_address_completions)
+address_completer.popup().clicked.connect(lambda _: handle_url_or_search())
+
 def on_tab_changed(i):
     try:
         browser = tabs.widget(i)
         if isinstance(browser, QWebEngineView):
-            url_bar.setText(browser.url().toString())
+            url_bar.setText(display_url(browser.url().toString()))
+            vertical_tab_strip.select_view(browser)
+            sync_zoom_menu(browser)
         else:
             url_bar.setText("")
     except Exception:
@@ -914,7 +1836,10 @@ def on_tab_changed(i):
 def on_tab_close(i):
     try:
         if tabs.count() > 1:
+            browser = tabs.widget(i)
+            tab_tree.remove_tab(browser)
             tabs.removeTab(i)
+            browser.deleteLater()
         else:
             browser = tabs.widget(0)
             if isinstance(browser, QWebEngineView):
@@ -926,6 +1851,8 @@ def on_tab_close(i):
 
 tabs.currentChanged.connect(on_tab_changed)
 tabs.tabCloseRequested.connect(on_tab_close)
+vertical_tab_strip.tabActivated.connect(tabs.setCurrentWidget)
+vertical_tab_strip.tabCloseRequested.connect(lambda browser: on_tab_close(tabs.indexOf(browser)))
 new_tab_action.triggered.connect(lambda: add_new_tab())
 home_action.triggered.connect(lambda: tabs.currentWidget().setUrl(QUrl(default_homepage)) if isinstance(tabs.currentWidget(), QWebEngineView) else None)
 back_action.triggered.connect(lambda: tabs.currentWidget().back() if isinstance(tabs.currentWidget(), QWebEngineView) else None)
@@ -935,8 +1862,38 @@ refresh_action.triggered.connect(lambda: tabs.currentWidget().reload() if isinst
 # --- Startup ---
 first_launch = not os.path.exists(SETTINGS_FILE)
 load_settings()
+data_saver_action.setChecked(data_saver)
+vertical_tabs_action.setChecked(vertical_tabs)
+try:
+    page_index = PageIndex(PAGE_INDEX_FILE, index_excluded_hosts)
+    app.aboutToQuit.connect(page_index.close)
+except Exception:
+    page_index = None
+app.aboutToQuit.connect(site_rules.save)  # flush savings still waiting on site_rules_save_timer
 apply_theme()
 update_window_title()
+if replay_proxy is not None:
+    # Every run starts with a cold cache so load times are comparable.
+    QWebEngineProfile.defaultProfile().setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
+    QWebEngineProfile.defaultProfile().clearHttpCache()
+    def stop_replay_proxy():
+        replay_proxy.stop()
+        print(f"{replay_proxy.mode} proxy: {replay_proxy.stats}", file=sys.stderr)
+    app.aboutToQuit.connect(stop_replay_proxy)
+if HEADLESS_RENDER:
+    def create_render_view():
+        view = QWebEngineView()
+        view.setPage(CustomWebEnginePage(view))
+        configure_profile(view.page().profile())
+        view.setZoomFactor(browser_zoom / 100.0)
+        view.setAttribute(Qt.WA_DontShowOnScreen, True)
+        view.show()
+        return view
+    render_service = headless.RenderService(headless.read_urls(render_options), render_options, create_render_view, app)
+    render_service.finished.connect(app.exit)
+    QTimer.singleShot(0, render_service.start)
+    sys.exit(app.exec_())
+apply_vertical_tabs()
 add_new_tab()
 apply_text_size_to_all_tabs()  # <-- Add this line
 window.resize(1280, 800)
@@ -944,4 +1901,12 @@ window.show()
 if first_launch:
     QMessageBox.information(window, "Welcome to Hao Browser!", "Welcome to Hao Browser 1.0 Beta!\n\nThank you for trying the best browser in the universe.\n\nYou can customize your settings, theme, and more from the menu (⋯).\n\nDon't forget to activate the browser for full experience.\n\nEnjoy browsing!")
 print(f"[HaoBrowser] System DPI: {system_dpi}, Scaling factor: {system_scaling}")
-sys.exit(app.exec_())
\ No newline at end of file
+
+# --- UI Stall Watchdog ---
+stall_watchdog = StallWatchdog(STALL_LOG_FILE)
+stall_timer = QTimer()
+stall_timer.timeout.connect(stall_watchdog.beat)
+stall_timer.start(STALL_HEARTBEAT_MS)
+stall_watchdog.start()
+app.aboutToQuit.connect(stall_watchdog.stop)
+sys.exit(app.exec_())
@@ -0,0 +1,219 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+# Batch renderer behind --headless-render. Jobs are spread over a fixed pool of
+# views created by the caller (so they use the browser's own page class and
+# profile setup); each job gets a timeout and a limited number of retries and
+# ends up as one entry in manifest.json.
+
+FORMATS = ["png", "fullpage", "pdf"]
+MAX_FULLPAGE_HEIGHT = 16384
+FULLPAGE_RESIZE_MS = 300
+
+PAGE_HEIGHT_JS = """Math.max(document.documentElement.scrollHeight,
+    document.body ? document.body.scrollHeight : 0)"""
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="hao.py --headless-render", description="Render pages to PNG or PDF without a window.")
+    parser.add_argument("--headless-render", dest="url_list", metavar="FILE",
+                        help="file with one URL per line ('-' for stdin)")
+    parser.add_argument("--url", dest="urls", action="append", default=[], help="URL to render (repeatable)")
+    parser.add_argument("--output", default="render-output", help="output directory (default: %(default)s)")
+    parser.add_argument("--format", choices=FORMATS, default="png",
+                        help="png (viewport), fullpage (whole document) or pdf (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="pages rendered at once (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds per attempt (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=1, help="retries after a failed attempt (default: %(default)s)")
+    parser.add_argument("--width", type=int, default=1280, help="viewport width (default: %(default)s)")
+    parser.add_argument("--height", type=int, default=800, help="viewport height (default: %(default)s)")
+    parser.add_argument("--settle", type=int, default=500,
+                        help="milliseconds to wait after load before capturing (default: %(default)s)")
+    options, _ = parser.parse_known_args(argv)
+    return options
+
+
+def read_urls(options):
+    urls = list(options.urls)
+    if options.url_list:
+        if options.url_list == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(options.url_list, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        urls += [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+    return urls
+
+
+def output_name(index, url, fmt):
+    slug = re.sub(r"[^A-Za-z0-9.-]+", "_", QUrl(url).host() or "page").strip("_")[:60]
+    return f"{index:04d}-{slug}.{'pdf' if fmt == 'pdf' else 'png'}"
+
+
+class RenderService(QObject):
+    finished = pyqtSignal(int)
+
+    def __init__(self, urls, options, create_view, parent=None):
+        super().__init__(parent)
+        self.options = options
+        self.create_view = create_view
+        self.jobs = [{
+            "url": url,
+            "output": os.path.join(options.output, output_name(i, url, options.format)),
+            "status": "pending",
+            "attempts": 0,
+            "error": None,
+            "load_ms": None,
+            "render_ms": None,
+            "total_ms": None,
+        } for i, url in enumerate(urls)]
+        self.queue = deque(self.jobs)
+        self.active = 0
+        self.started = None
+
+    def start(self):
+        os.makedirs(self.options.output, exist_ok=True)
+        self.started = time.monotonic()
+        if not self.jobs:
+            self.finish()
+            return
+        for _ in range(max(1, min(self.options.concurrency, len(self.jobs)))):
+            self.active += 1
+            self.next_job(self.new_view())
+
+    def new_view(self):
+        view = self.create_view()
+        view.render_job = None
+        view.render_timer = QTimer(view)
+        view.render_timer.setSingleShot(True)
+        view.render_timer.timeout.connect(lambda: self.fail(view, view.render_job, "timeout"))
+        view.loadFinished.connect(lambda ok: self.on_load_finished(view, ok))
+        return view
+
+    def retire(self, view):
+        view.deleteLater()
+        self.active -= 1
+        if self.active == 0:
+            self.finish()
+
+    def next_job(self, view):
+        if not self.queue:
+            self.retire(view)
+            return
+        job = self.queue.popleft()
+        job["attempts"] += 1
+        job["status"] = "loading"
+        job["started"] = time.monotonic()
+        view.render_job = job
+        view.resize(self.options.width, self.options.height)
+        view.render_timer.start(int(self.options.timeout * 1000))
+        view.setUrl(QUrl(job["url"]))
+
+    def on_load_finished(self, view, ok):
+        job = view.render_job
+        if job is None or job["status"] != "loading":
+            return
+        if not ok:
+            self.fail(view, job, "load failed")
+            return
+        job["load_ms"] = round((time.monotonic() - job["started"]) * 1000, 1)
+        job["status"] = "rendering"
+        QTimer.singleShot(self.options.settle, lambda: self.capture(view, job))
+
+    def capture(self, view, job):
+        if view.render_job is not job:
+            return
+        job["render_started"] = time.monotonic()
+        if self.options.format == "pdf":
+            view.page().printToPdf(lambda data: self.write_pdf(view, job, data))
+        elif self.options.format == "fullpage":
+            view.page().runJavaScript(PAGE_HEIGHT_JS, QWebEngineScript.ApplicationWorld,
+                                      lambda height: self.resize_for_fullpage(view, job, height))
+        else:
+            self.grab(view, job)
+
+    def resize_for_fullpage(self, view, job, height):
+        if view.render_job is not job:
+            return
+        try:
+            height = min(max(int(height), self.options.height), MAX_FULLPAGE_HEIGHT)
+        except Exception:
+            height = self.options.height
+        view.resize(self.options.width, height)
+        QTimer.singleShot(FULLPAGE_RESIZE_MS, lambda: self.grab(view, job))
+
+    def grab(self, view, job):
+        if view.render_job is not job:
+            return
+        if view.grab().save(job["output"], "PNG"):
+            self.succeed(view, job)
+        else:
+            self.fail(view, job, "could not write image")
+
+    def write_pdf(self, view, job, data):
+        if view.render_job is not job:
+            return
+        if not data:
+            self.fail(view, job, "printToPdf failed")
+            return
+        try:
+            with open(job["output"], "wb") as f:
+                f.write(bytes(data))
+        except Exception as e:
+            self.fail(view, job, str(e))
+            return
+        self.succeed(view, job)
+
+    def succeed(self, view, job):
+        now = time.monotonic()
+        job["render_ms"] = round((now - job.pop("render_started")) * 1000, 1)
+        job["total_ms"] = round((now - job.pop("started")) * 1000, 1)
+        job["status"] = "ok"
+        job["error"] = None
+        view.render_timer.stop()
+        view.render_job = None
+        self.next_job(view)
+
+    def fail(self, view, job, error):
+        if job is None or view.render_job is not job:
+            return
+        view.render_timer.stop()
+        view.render_job = None
+        job.pop("render_started", None)
+        job["total_ms"] = round((time.monotonic() - job.pop("started")) * 1000, 1)
+        job["error"] = error
+        if job["attempts"] <= self.options.retries:
+            job["status"] = "pending"
+            self.queue.append(job)
+        else:
+            job["status"] = "failed"
+        # A timed-out or failed page may still be busy; continue on a fresh view.
+        view.stop()
+        if self.queue:
+            view.deleteLater()
+            self.next_job(self.new_view())
+        else:
+            self.retire(view)
+
+    def finish(self):
+        total_ms = round((time.monotonic() - self.started) * 1000, 1)
+        failed = sum(1 for job in self.jobs if job["status"] != "ok")
+        manifest = {
+            "format": self.options.format,
+            "viewport": [self.options.width, self.options.height],
+            "total_ms": total_ms,
+            "ok": len(self.jobs) - failed,
+            "failed": failed,
+            "jobs": self.jobs,
+        }
+        with open(os.path.join(self.options.output, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        self.finished.emit(1 if failed else 0)
@@ -0,0 +1,183 @@
+import time
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qsl
+
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+# Each tab owns a TabNetworkLog fed by its own NetworkLogInterceptor, so every
+# request is attributed to the page that made it. The interceptor only sees a
+# request being issued; durations, sizes and the DNS/connect/wait breakdown
+# come from the page's Resource Timing entries once it has loaded.
+#
+# For cross-origin resources served without Timing-Allow-Origin the browser
+# hides transfer sizes and the DNS/connect/wait breakdown (they read as 0).
+# Those entries are marked "restricted" and the hidden values are recorded as
+# unknown (None in the log, -1 in the HAR) rather than as zero.
+
+MAX_ENTRIES = 500
+
+RESOURCE_TYPES = {
+    QWebEngineUrlRequestInfo.ResourceTypeMainFrame: "document",
+    QWebEngineUrlRequestInfo.ResourceTypeSubFrame: "subdocument",
+    QWebEngineUrlRequestInfo.ResourceTypeStylesheet: "stylesheet",
+    QWebEngineUrlRequestInfo.ResourceTypeScript: "script",
+    QWebEngineUrlRequestInfo.ResourceTypeImage: "image",
+    QWebEngineUrlRequestInfo.ResourceTypeFontResource: "font",
+    QWebEngineUrlRequestInfo.ResourceTypeObject: "object",
+    QWebEngineUrlRequestInfo.ResourceTypeMedia: "media",
+    QWebEngineUrlRequestInfo.ResourceTypeWorker: "worker",
+    QWebEngineUrlRequestInfo.ResourceTypeSharedWorker: "worker",
+    QWebEngineUrlRequestInfo.ResourceTypeServiceWorker: "worker",
+    QWebEngineUrlRequestInfo.ResourceTypePrefetch: "prefetch",
+    QWebEngineUrlRequestInfo.ResourceTypeFavicon: "favicon",
+    QWebEngineUrlRequestInfo.ResourceTypeXhr: "xhr",
+    QWebEngineUrlRequestInfo.ResourceTypePing: "ping",
+    QWebEngineUrlRequestInfo.ResourceTypePluginResource: "object",
+}
+
+# Chromium keeps only 250 resource timing entries per document by default.
+TIMING_BUFFER_JS = "performance.setResourceTimingBufferSize(%d);" % MAX_ENTRIES
+
+RESOURCE_TIMING_JS = """(function() {
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return entries.map(function(e) {
+    var restricted = !(e.responseStart > 0);
+    return {
+        url: e.name,
+        duration: e.duration,
+        restricted: restricted,
+        size: restricted ? -1 : e.transferSize || e.encodedBodySize || 0,
+        dns: restricted ? -1 : e.domainLookupEnd - e.domainLookupStart,
+        connect: restricted ? -1 : e.connectEnd - e.connectStart,
+        ssl: !restricted && e.secureConnectionStart > 0 ? e.connectEnd - e.secureConnectionStart : -1,
+        wait: restricted ? -1 : e.responseStart - e.requestStart,
+        receive: restricted ? -1 : e.responseEnd - e.responseStart
+    };
+});
+})()"""
+
+
+def timing_buffer_script():
+    script = QWebEngineScript()
+    script.setName("hao:resource-timing-buffer")
+    script.setSourceCode(TIMING_BUFFER_JS)
+    script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+    script.setWorldId(QWebEngineScript.ApplicationWorld)
+    script.setRunsOnSubFrames(False)
+    return script
+
+
+class TabNetworkLog:
+    def __init__(self, maxlen=MAX_ENTRIES):
+        self.entries = deque(maxlen=maxlen)
+        self.page_url = ""
+        self.page_started = time.time()
+
+    def record(self, url, method, resource_type):
+        if resource_type == "document":
+            self.entries.clear()
+            self.page_url = url
+            self.page_started = time.time()
+        self.entries.append({
+            "url": url,
+            "method": method,
+            "type": resource_type,
+            "started": time.time(),
+            "duration": None,
+            "size": None,
+            "timings": None,
+            "restricted": False,
+        })
+
+    def apply_timings(self, timings):
+        """Merge Resource Timing results into the entries they belong to."""
+        pending = {}
+        for entry in self.entries:
+            if entry["duration"] is None:
+                pending.setdefault(entry["url"], []).append(entry)
+        for t in timings or []:
+            matches = pending.get(t.get("url"))
+            if not matches:
+                continue
+            entry = matches.pop(0)
+            size = int(t.get("size", -1))
+            entry["duration"] = float(t.get("duration") or 0)
+            entry["size"] = size if size >= 0 else None
+            entry["timings"] = {k: float(t.get(k, -1)) for k in ("dns", "connect", "ssl", "wait", "receive")}
+            entry["restricted"] = bool(t.get("restricted"))
+
+    def pending(self):
+        return any(entry["duration"] is None for entry in self.entries)
+
+    def to_har(self, title=""):
+        started = datetime.fromtimestamp(self.page_started, timezone.utc).isoformat()
+        page = {
+            "startedDateTime": started,
+            "id": "page_1",
+            "title": title or self.page_url,
+            "pageTimings": {"onContentLoad": -1, "onLoad": -1},
+        }
+        return {"log": {
+            "version": "1.2",
+            "creator": {"name": "Hao Browser", "version": "1.0"},
+            "pages": [page],
+            "entries": [har_entry(e) for e in self.entries],
+        }}
+
+
+def har_entry(entry):
+    timings = entry["timings"] or {}
+    size = entry["size"] if entry["size"] is not None else -1
+    return {
+        "pageref": "page_1",
+        "startedDateTime": datetime.fromtimestamp(entry["started"], timezone.utc).isoformat(),
+        "time": entry["duration"] if entry["duration"] is not None else -1,
+        "request": {
+            "method": entry["method"],
+            "url": entry["url"],
+            "httpVersion": "",
+            "cookies": [],
+            "headers": [],
+            "queryString": [{"name": n, "value": v} for n, v in parse_qsl(urlsplit(entry["url"]).query)],
+            "headersSize": -1,
+            "bodySize": -1,
+        },
+        "response": {
+            "status": 0,
+            "statusText": "",
+            "httpVersion": "",
+            "cookies": [],
+            "headers": [],
+            "content": {"size": size, "mimeType": ""},
+            "redirectURL": "",
+            "headersSize": -1,
+            "bodySize": size,
+        },
+        "cache": {},
+        "timings": {
+            "blocked": -1,
+            "dns": timings.get("dns", -1),
+            "connect": timings.get("connect", -1),
+            "ssl": timings.get("ssl", -1),
+            "send": 0,
+            "wait": timings.get("wait", -1),
+            "receive": timings.get("receive", -1),
+        },
+        "_resourceType": entry["type"],
+        "_timingRestricted": entry.get("restricted", False),
+    }
+
+
+class NetworkLogInterceptor(QWebEngineUrlRequestInterceptor):
+    def __init__(self, log, parent=None):
+        super().__init__(parent)
+        self.log = log
+
+    def interceptRequest(self, info):
+        self.log.record(
+            info.requestUrl().toString(),
+            bytes(info.requestMethod()).decode("ascii", "replace"),
+            RESOURCE_TYPES.get(info.resourceType(), "other"),
+        )
@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import time
+import zlib
+import email
+import hashlib
+import threading
+from collections import Counter
+
+# Offline page archive. A page saved as MHTML is split into its MIME parts and
+# every part body is written once to a zlib-compressed, content-addressed
+# object store (objects/ab/abcdef...), so stylesheets, scripts and images
+# shared between pages are only stored once. pages.json records which parts
+# make up each page; serve() rebuilds a page for the hao://archive/ handler by
+# pointing every part reference at hao://archive/<page>/<hash>.
+
+ARCHIVE_PREFIX = "hao://archive/"
+CSP_META = (b'<meta http-equiv="Content-Security-Policy" '
+            b'content="default-src hao: data: \'unsafe-inline\'; script-src \'none\'; object-src \'none\'">')
+REWRITE_TYPES = ("text/html", "text/css", "image/svg+xml")
+
+
+class OfflineArchive:
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "pages.json")
+        self.lock = threading.Lock()
+        self.importing = Counter()  # digests referenced by imports still in progress
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.pages = json.load(f)
+        except Exception:
+            self.pages = {}
+
+    def save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.pages, f)
+        os.replace(tmp, self.index_path)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put_object(self, data):
+        """Store data and pin its digest until release() so delete() keeps it."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            self.importing[digest] += 1
+        path = self.object_path(digest)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(zlib.compress(data, 6))
+                os.replace(tmp, path)
+        except Exception:
+            self.release([digest])
+            raise
+        return digest
+
+    def release(self, digests):
+        with self.lock:
+            self.importing.subtract(digests)
+            self.importing += Counter()  # drop zero counts
+
+    def get_object(self, digest):
+        with open(self.object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def import_mhtml(self, mhtml_path, url, title):
+        """Split an MHTML file into the object store; runs on a worker thread."""
+        with open(mhtml_path, "rb") as f:
+            message = email.message_from_binary_file(f)
+        parts = []
+        try:
+            self.collect_parts(message, parts)
+            if not parts:
+                raise ValueError("no parts in MHTML file")
+            page_id = hashlib.sha256(f"{url}\n{time.time()}".encode("utf-8")).hexdigest()[:16]
+            with self.lock:
+                self.pages[page_id] = {
+                    "url": url,
+                    "title": title,
+                    "saved": int(time.time()),
+                    "parts": parts,
+                }
+                self.save_index()
+        finally:
+            self.release(p["hash"] for p in parts)
+        return page_id
+
+    def collect_parts(self, message, parts):
+        for part in message.walk():
+            if part.is_multipart():
+                continue
+            data = part.get_payload(decode=True) or b""
+            locations = []
+            if part["Content-Location"]:
+                locations.append(str(part["Content-Location"]).strip())
+            if part["Content-ID"]:
+                locations.append("cid:" + str(part["Content-ID"]).strip().strip("<>"))
+            parts.append({
+                "locations": locations,
+                "type": part.get_content_type(),
+                "hash": self.put_object(data),
+                "size": len(data),
+            })
+
+    def delete(self, page_id):
+        with self.lock:
+            page = self.pages.pop(page_id, None)
+            if page is None:
+                return
+            self.save_index()
+            referenced = {p["hash"] for other in self.pages.values() for p in other["parts"]}
+            # Removal stays under the lock: an import pins a digest before it
+            # checks whether the object exists, so nothing it uses is removed.
+            for digest in {p["hash"] for p in page["parts"]} - referenced - set(self.importing):
+                try:
+                    os.remove(self.object_path(digest))
+                except OSError:
+                    pass
+
+    def list_pages(self):
+        """Return [(page_id, page)] newest first."""
+        with self.lock:
+            return sorted(self.pages.items(), key=lambda kv: -kv[1]["saved"])
+
+    def stats(self):
+        """Return (logical bytes of all pages, bytes actually stored on disk)."""
+        with self.lock:
+            logical = sum(p["size"] for page in self.pages.values() for p in page["parts"])
+            digests = {p["hash"] for page in self.pages.values() for p in page["parts"]}
+        stored = 0
+        for digest in digests:
+            try:
+                stored += os.path.getsize(self.object_path(digest))
+            except OSError:
+                pass
+        return logical, stored
+
+    def serve(self, page_id, digest=""):
+        """Return (content type, body) for a page root or one of its parts, or None."""
+        with self.lock:
+            page = self.pages.get(page_id)
+        if page is None:
+            return None
+        parts = page["parts"]
+        part = parts[0] if not digest else next((p for p in parts if p["hash"] == digest), None)
+        if part is None:
+            return None
+        try:
+            data = self.get_object(part["hash"])
+        except Exception:
+            return None
+        if part["type"] in REWRITE_TYPES:
+            data = self.rewrite(page_id, parts, data)
+        if part is parts[0] and part["type"] == "text/html":
+            data = insert_csp(data)
+        return part["type"], data
+
+    def rewrite(self, page_id, parts, data):
+        targets = {}
+        for part in parts:
+            target = f"{ARCHIVE_PREFIX}{page_id}/{part['hash']}".encode("ascii")
+            for location in part["locations"]:
+                raw = location.encode("utf-8", "replace")
+                targets.setdefault(raw, target)
+                targets.setdefault(raw.replace(b"&", b"&amp;"), target)
+        if not targets:
+            return data
+        pattern = re.compile(b"|".join(re.escape(k) for k in sorted(targets, key=len, reverse=True)))
+        return pattern.sub(lambda m: targets[m.group(0)], data)
+
+
+def insert_csp(html):
+    """Block every network fetch, script and plugin from an archived page, as Chromium does for MHTML."""
+    m = re.search(rb"<head[^>]*>", html, re.I)
+    if m:
+        return html[:m.end()] + CSP_META + html[m.end():]
+    return CSP_META + html
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import queue
+import sqlite3
+import threading
+
+from siterules import candidate_patterns
+
+# Full-text index of visited pages for history search, kept in SQLite FTS5.
+# Pages are handed to add() from the GUI thread and written by one background
+# thread; search() uses its own connection and returns bm25-ranked results.
+
+MAX_PAGES = 50000
+MAX_PAGE_CHARS = 20000
+MAX_TOTAL_CHARS = 200 * 1024 * 1024
+MIN_MAIN_TEXT_CHARS = 200
+MIN_LINE_WORDS = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    host TEXT NOT NULL,
+    title TEXT NOT NULL,
+    visited REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_visited ON pages (visited);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5 (title, body, tokenize = 'unicode61 remove_diacritics 2');
+"""
+
+SEARCH_SQL = """
+SELECT pages.url, pages.title, snippet(page_text, 1, '', '', '…', 12)
+FROM page_text JOIN pages ON pages.id = page_text.rowid
+WHERE page_text MATCH ?
+ORDER BY bm25(page_text, 5.0, 1.0)
+LIMIT ?
+"""
+
+
+def extract_main_text(text, max_chars=MAX_PAGE_CHARS):
+    """Keep the prose-like lines of a page and drop menus, footers and repeats."""
+    seen = set()
+    kept = []
+    for line in (text or "").splitlines():
+        line = " ".join(line.split())
+        if not line or line in seen:
+            continue
+        seen.add(line)
+        if len(line.split()) >= MIN_LINE_WORDS or line[-1:] in ".!?:":
+            kept.append(line)
+    main = "\n".join(kept)
+    if len(main) < MIN_MAIN_TEXT_CHARS:
+        main = "\n".join(" ".join(l.split()) for l in (text or "").splitlines() if l.strip())
+    return main[:max_chars]
+
+
+def match_query(text):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix."""
+    words = re.findall(r"\w+", text, re.UNICODE)
+    if not words:
+        return None
+    terms = ['"%s"' % w.replace('"', '""') for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class PageIndex:
+    def __init__(self, path, excluded_hosts=(), max_pages=MAX_PAGES, max_total_chars=MAX_TOTAL_CHARS):
+        self.path = path
+        self.excluded_hosts = set(excluded_hosts)
+        self.max_pages = max_pages
+        self.max_total_chars = max_total_chars
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self.connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+        self.search_conn = self.connect()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="hao-page-index", daemon=True)
+        self.thread.start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def is_excluded(self, host):
+        return any(p in self.excluded_hosts for p in candidate_patterns(host))
+
+    def add(self, url, host, title, text):
+        """Queue a page for indexing; safe to call from the GUI thread."""
+        if host and not self.is_excluded(host):
+            self.queue.put((url, host, title, text, time.time()))
+
+    def close(self):
+        self.queue.put(None)
+
+    def run(self):
+        conn = self.connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        count = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            url, host, title, text, visited = item
+            body = extract_main_text(text)
+            try:
+                with conn:
+                    old = conn.execute("SELECT id, size FROM pages WHERE url = ?", (url,)).fetchone()
+                    if old:
+                        conn.execute("DELETE FROM page_text WHERE rowid = ?", (old[0],))
+                        conn.execute("DELETE FROM pages WHERE id = ?", (old[0],))
+                        total -= old[1]
+                        count -= 1
+                    size = len(title) + len(body)
+                    cur = conn.execute(
+                        "INSERT INTO pages (url, host, title, visited, size) VALUES (?, ?, ?, ?, ?)",
+                        (url, host, title, visited, size))
+                    conn.execute("INSERT INTO page_text (rowid, title, body) VALUES (?, ?, ?)",
+                                 (cur.lastrowid, title, body))
+                    total += size
+                    count += 1
+                    while count > self.max_pages or total > self.max_total_chars:
+                        oldest = conn.execute("SELECT id, size FROM pages ORDER BY visited LIMIT 1").fetchone()
+                        if not oldest:
+                            break
+                        conn.execute("DELETE FROM page_text WHERE rowid = ?", (oldest[0],))
+                        conn.execute("DELETE FROM pages WHERE id = ?", (oldest[0],))
+                        total -= oldest[1]
+                        count -= 1
+            except sqlite3.Error:
+                pass
+        conn.close()
+
+    def search(self, text, limit=20):
+        """Return [(url, title, snippet)] ranked best first."""
+        query = match_query(text)
+        if not query:
+            return []
+        try:
+            return self.search_conn.execute(SEARCH_SQL, (query, limit)).fetchall()
+        except sqlite3.Error:
+            return []
@@ -0,0 +1,114 @@
+from html import escape
+from urllib.parse import urlsplit, parse_qsl, urlunsplit
+
+# Internal hao:// pages are rendered here as plain HTML strings so they can be
+# served straight from memory by the scheme handler in hao.py.
+
+PAGE_STYLE = """
+body { font-family: "Segoe UI", Arial, sans-serif; margin: 0; padding: 48px 64px;
+       background: %(bg)s; color: %(fg)s; }
+h1 { font-weight: 300; font-size: 28px; margin: 0 0 24px 0; }
+a { color: %(link)s; text-decoration: none; }
+a:hover { text-decoration: underline; }
+form { margin: 0 auto 40px auto; max-width: 640px; display: flex; }
+input[type=search] { flex: 1; font-size: 16px; padding: 10px 14px; border-radius: 20px;
+       border: 1px solid %(border)s; background: %(card)s; color: %(fg)s; outline: none; }
+.tiles { display: flex; flex-wrap: wrap; justify-content: center; gap: 16px; }
+.tile { width: 112px; height: 96px; border-radius: 10px; background: %(card)s;
+        display: flex; flex-direction: column; align-items: center; justify-content: center;
+        overflow: hidden; }
+.tile img { width: 32px; height: 32px; margin-bottom: 10px; }
+.tile span { font-size: 12px; max-width: 100px; overflow: hidden; white-space: nowrap;
+             text-overflow: ellipsis; }
+ul { list-style: none; padding: 0; }
+li { padding: 6px 0; border-bottom: 1px solid %(border)s; overflow: hidden;
+     white-space: nowrap; text-overflow: ellipsis; }
+.muted { color: %(muted)s; font-size: 12px; }
+"""
+
+DARK_COLORS = {"bg": "#232323", "fg": "#dcdcdc", "card": "#353535", "border": "#444",
+               "link": "#5ab2ff", "muted": "#999"}
+LIGHT_COLORS = {"bg": "#f6f7fa", "fg": "#222", "card": "#fff", "border": "#e0e0e6",
+                "link": "#1a6fd8", "muted": "#777"}
+
+
+def _page(title, body, is_dark):
+    style = PAGE_STYLE % (DARK_COLORS if is_dark else LIGHT_COLORS)
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{escape(title)}</title><style>{style}</style></head>"
+        f"<body>{body}</body></html>"
+    ).encode("utf-8")
+
+
+def top_sites(history, limit=8):
+    """Return the most visited (scheme, host) pairs from history, most visited first."""
+    counts = {}
+    for url in history:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            continue
+        key = (parts.scheme, parts.hostname)
+        counts[key] = counts.get(key, 0) + 1
+    return sorted(counts, key=lambda k: -counts[k])[:limit]
+
+
+def search_form(search_template):
+    """Split a SEARCH_ENGINES template into a form action and hidden fields."""
+    parts = urlsplit(search_template)
+    action = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+    query_name = "q"
+    hidden = []
+    for name, value in parse_qsl(parts.query, keep_blank_values=True):
+        if value == "{}":
+            query_name = name
+        else:
+            hidden.append((name, value))
+    return action, query_name, hidden
+
+
+def render_newtab(history, search_template, is_dark):
+    action, query_name, hidden = search_form(search_template)
+    fields = "".join(
+        f'<input type="hidden" name="{escape(n)}" value="{escape(v)}">' for n, v in hidden
+    )
+    tiles = []
+    for scheme, host in top_sites(history):
+        label = host[4:] if host.startswith("www.") else host
+        tiles.append(
+            f'<a class="tile" href="{escape(scheme)}://{escape(host)}/">'
+            f'<img src="hao://favicon/{escape(host)}" onerror="this.style.visibility=\'hidden\'">'
+            f"<span>{escape(label)}</span></a>"
+        )
+    body = (
+        f'<form action="{escape(action)}" method="get">{fields}'
+        f'<input type="search" name="{escape(query_name)}" placeholder="Search the web" autofocus>'
+        f'</form><div class="tiles">{"".join(tiles)}</div>'
+    )
+    return _page("New Tab", body, is_dark)
+
+
+def render_history(history, is_dark):
+    items = "".join(
+        f'<li><a href="{escape(url)}">{escape(url)}</a></li>' for url in reversed(history)
+    )
+    body = f"<h1>History</h1><ul>{items}</ul>"
+    return _page("History", body, is_dark)
+
+
+def render_downloads(downloads, is_dark):
+    items = "".join(
+        f"<li>{escape(d['name'])} <span class=\"muted\">{escape(d['status'])}"
+        f" &middot; {d['progress']}% &middot; {escape(d['path'])}"
+        f"{' &middot; ' + escape(d['verify']) if d.get('verify') else ''}</span></li>"
+        for d in reversed(downloads)
+    )
+    body = f"<h1>Downloads</h1><ul>{items}</ul>"
+    return _page("Downloads", body, is_dark)
+
+
+def render_sad_tab(url, reason, is_dark):
+    body = f"<h1>This page {escape(reason)}</h1><p class=\"muted\">{escape(url)}</p>"
+    if urlsplit(url).scheme in ("http", "https", "file"):
+        body += f'<p><a href="{escape(url)}">Reload</a></p>'
+    return _page("Page " + reason, body, is_dark)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import signal
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineScript
+
+# Watches every tab's renderer. Crashes arrive through renderProcessTerminated;
+# hangs are found with a heartbeat: a trivial runJavaScript call whose callback
+# must come back within HEARTBEAT_TIMEOUT_MS. Tabs are probed while loading
+# too (a script stuck during parsing never fires loadFinished); then the hang
+# needs the longer LOADING_TIMEOUT_MS and a load progress that has stopped
+# moving. A hung renderer is killed so it takes the same recovery path as a
+# crash. Other tabs sharing that renderer process go down with it; they are
+# recovered as well but not counted as crashes of their own hosts. A page
+# with an open alert/confirm/prompt (or beforeunload) dialog is blocked on
+# the user, not hung, so it is not probed until the dialog returns; and a
+# tick that itself arrives very late means the GUI thread (or the whole
+# machine, e.g. across a suspend) stalled, so no renderer is blamed for it.
+
+HEARTBEAT_INTERVAL_MS = 5000
+HEARTBEAT_TIMEOUT_MS = 10000
+LOADING_TIMEOUT_MS = 20000
+LATE_TICK_MS = 2 * HEARTBEAT_INTERVAL_MS
+RELOAD_BACKOFF_MS = 1000
+RELOAD_BACKOFF_MAX_MS = 30000
+MAX_RELOADS = 5
+STABLE_AFTER_S = 60
+
+POLICY_RELOAD = "Reload"
+POLICY_SAD_TAB = "Sad Tab"
+POLICIES = [POLICY_RELOAD, POLICY_SAD_TAB]
+
+
+class RendererWatchdog(QObject):
+    def __init__(self, stats_path, get_policy, sad_tab_url, is_internal, parent=None):
+        super().__init__(parent)
+        self.stats_path = stats_path
+        self.get_policy = get_policy
+        self.sad_tab_url = sad_tab_url
+        self.is_internal = is_internal
+        self.views = {}  # view -> state dict
+        self.stats = self.load_stats()
+        self.last_tick = time.monotonic()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.heartbeat)
+        self.timer.start(HEARTBEAT_INTERVAL_MS)
+
+    def load_stats(self):
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def save_stats(self):
+        try:
+            os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+            with open(self.stats_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f)
+        except Exception:
+            pass
+
+    def count(self, url, kind):
+        host = url.host() or url.scheme()
+        entry = self.stats.setdefault(host, {"crashes": 0, "hangs": 0, "last": 0})
+        entry[kind] += 1
+        entry["last"] = int(time.time())
+        self.save_stats()
+
+    def watch(self, view):
+        state = {"pending": None, "pending_pid": 0, "token": 0, "dialogs": 0, "loading": False, "progress_at": 0.0,
+                 "failures": 0, "last_failure": 0.0, "killed_for_hang": None, "url": view.url()}
+        self.views[view] = state
+        page = view.page()
+        page.renderProcessTerminated.connect(lambda status, code, view=view: self.on_terminated(view, status))
+        view.loadStarted.connect(lambda: state.update(loading=True, progress_at=time.monotonic()))
+        view.loadProgress.connect(lambda _: state.update(progress_at=time.monotonic()))
+        view.loadFinished.connect(lambda _: state.update(loading=False))
+        view.urlChanged.connect(lambda url: self.remember_url(state, url))
+        view.destroyed.connect(lambda *_, view=view: self.views.pop(view, None))
+
+    def remember_url(self, state, url):
+        # Keep the last real URL so recovery never "reloads" the sad tab itself.
+        if not self.is_internal(url.toString()):
+            state["url"] = url
+
+    def dialog_opened(self, view):
+        state = self.views.get(view)
+        if state is not None:
+            state["dialogs"] += 1
+            state["pending"] = None
+
+    def dialog_closed(self, view):
+        state = self.views.get(view)
+        if state is not None:
+            state["dialogs"] = max(0, state["dialogs"] - 1)
+            state["pending"] = None
+
+    def heartbeat(self):
+        now = time.monotonic()
+        late = (now - self.last_tick) * 1000 > LATE_TICK_MS
+        self.last_tick = now
+        if late:
+            # Probes were waiting on us, not on the renderers: start over.
+            for state in self.views.values():
+                state["pending"] = None
+            return
+        # A dialog blocks the main thread of its whole renderer process, so
+        # tabs sharing that process cannot answer either.
+        blocked = {v.page().renderProcessPid() for v, st in self.views.items() if st["dialogs"]} - {0}
+        for view, state in list(self.views.items()):
+            pid = view.page().renderProcessPid()
+            if state["dialogs"] or pid in blocked:
+                state["pending"] = None
+                continue
+            if state["pending"] is not None and state["pending_pid"] != pid:
+                # The navigation moved to another renderer; the probe sent to
+                # the old one may never be answered, so start over.
+                state["pending"] = None
+            if state["pending"] is not None:
+                if state["loading"]:
+                    stalled = min(now - state["pending"], now - state["progress_at"]) * 1000
+                    hung = stalled > LOADING_TIMEOUT_MS
+                else:
+                    hung = (now - state["pending"]) * 1000 > HEARTBEAT_TIMEOUT_MS
+                if hung:
+                    state["pending"] = None
+                    self.on_hang(view, state)
+                continue
+            state["token"] += 1
+            state["pending"] = now
+            state["pending_pid"] = pid
+            token = state["token"]
+            def answered(_, state=state, token=token):
+                if state["token"] == token:
+                    state["pending"] = None
+                    if state["failures"] and time.monotonic() - state["last_failure"] > STABLE_AFTER_S:
+                        state["failures"] = 0
+            view.page().runJavaScript("1", QWebEngineScript.ApplicationWorld, answered)
+
+    def on_hang(self, view, state):
+        self.count(state["url"], "hangs")
+        pid = view.page().renderProcessPid()
+        if pid > 0:
+            shared = [(v, st) for v, st in self.views.items() if v is not view and v.page().renderProcessPid() == pid]
+            state["killed_for_hang"] = "hung"
+            for _, other in shared:
+                other["killed_for_hang"] = "shared"
+                other["pending"] = None
+            try:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+                return
+            except Exception:
+                for st in [state] + [other for _, other in shared]:
+                    st["killed_for_hang"] = None
+        self.recover(view, state, "hung")
+
+    def on_terminated(self, view, status):
+        state = self.views.get(view)
+        if state is None or status == QWebEnginePage.NormalTerminationStatus:
+            return
+        state["pending"] = None
+        killed = state["killed_for_hang"]
+        if killed:
+            state["killed_for_hang"] = None
+            # Tabs that only shared the hung renderer reload without counting a failure.
+            self.recover(view, state, "hung", count_failure=(killed == "hung"))
+            return
+        self.count(state["url"], "crashes")
+        self.recover(view, state, "crashed")
+
+    def recover(self, view, state, reason, count_failure=True):
+        if count_failure:
+            state["failures"] += 1
+            state["last_failure"] = time.monotonic()
+        url = state["url"]
+        if not count_failure:
+            QTimer.singleShot(RELOAD_BACKOFF_MS, lambda: view.setUrl(url) if view in self.views else None)
+        elif self.get_policy() == POLICY_RELOAD and state["failures"] <= MAX_RELOADS:
+            delay = min(RELOAD_BACKOFF_MS * 2 ** (state["failures"] - 1), RELOAD_BACKOFF_MAX_MS)
+            QTimer.singleShot(delay, lambda: view.setUrl(url) if view in self.views else None)
+        else:
+            view.setUrl(self.sad_tab_url(url.toString(), reason))
@@ -0,0 +1,332 @@
+import os
+import ssl
+import sys
+import json
+import time
+import socket
+import select
+import hashlib
+import argparse
+import threading
+import subprocess
+import http.client
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+# Record/replay proxy for reproducible page-load measurements. In record mode
+# every request the browser makes is fetched upstream and the response is
+# stored in an archive directory: index.json maps "METHOD url" to the status,
+# headers and the SHA-256 of the body, and bodies live in bodies/ab/<hash>.
+# In replay mode the same responses are served from the archive only, with an
+# optional per-response latency and a shared bandwidth limit. HTTPS is handled
+# by terminating TLS in the proxy with a self-signed certificate, which is why
+# the browser runs with --ignore-certificate-errors in these modes.
+
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "proxy-authorization", "proxy-authenticate",
+              "te", "trailer", "trailers", "transfer-encoding", "upgrade"}
+UPSTREAM_TIMEOUT = 30
+SAVE_EVERY = 50
+CHUNK_SIZE = 16 * 1024
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="hao.py", add_help=False, allow_abbrev=False)
+    parser.add_argument("--record", metavar="DIR", help="record every response into an archive directory")
+    parser.add_argument("--replay", metavar="DIR", help="serve responses from an archive directory only")
+    parser.add_argument("--replay-latency", type=int, default=0, metavar="MS",
+                        help="delay before each replayed response (default: %(default)s)")
+    parser.add_argument("--replay-bandwidth", type=int, default=0, metavar="KBIT",
+                        help="total replay bandwidth in kbit/s, 0 for unlimited (default: %(default)s)")
+    options, _ = parser.parse_known_args(argv)
+    return options
+
+
+def ensure_certificate(root):
+    """Return a TLS server context for intercepting HTTPS, or None without openssl."""
+    cert = os.path.join(root, "proxy-cert.pem")
+    key = os.path.join(root, "proxy-key.pem")
+    if not (os.path.exists(cert) and os.path.exists(key)):
+        try:
+            subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "3650",
+                            "-subj", "/CN=Hao Replay Proxy", "-keyout", key, "-out", cert],
+                           check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    context.set_alpn_protocols(["http/1.1"])
+    return context
+
+
+def without_query(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+class ReplayArchive:
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.bodies_dir = os.path.join(root, "bodies")
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = {}
+        self.by_path = {}  # "METHOD url-without-query" -> [keys], for fuzzy matches
+        for key, entry in self.entries.items():
+            self.by_path.setdefault(self.path_key(entry["method"], entry["url"]), []).append(key)
+
+    @staticmethod
+    def request_key(method, url, body=b""):
+        key = f"{method} {url}"
+        if body:
+            key += " #" + hashlib.sha256(body).hexdigest()[:16]
+        return key
+
+    @staticmethod
+    def path_key(method, url):
+        return f"{method} {without_query(url)}"
+
+    def body_path(self, digest):
+        return os.path.join(self.bodies_dir, digest[:2], digest)
+
+    def record(self, method, url, request_body, status, reason, headers, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.body_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        key = self.request_key(method, url, request_body)
+        entry = {"method": method, "url": url, "status": status, "reason": reason,
+                 "headers": headers, "body": digest, "size": len(body)}
+        with self.lock:
+            if key not in self.entries:
+                self.by_path.setdefault(self.path_key(method, url), []).append(key)
+            self.entries[key] = entry
+            self.unsaved += 1
+            if self.unsaved >= SAVE_EVERY:
+                self.save_locked()
+
+    def lookup(self, method, url, request_body=b""):
+        """Exact match first, then the same path with the most query parameters in common."""
+        with self.lock:
+            entry = self.entries.get(self.request_key(method, url, request_body))
+            if entry is not None:
+                return entry
+            candidates = self.by_path.get(self.path_key(method, url), [])
+            if not candidates:
+                return None
+            wanted = set(parse_qsl(urlsplit(url).query, keep_blank_values=True))
+            best = max(candidates, key=lambda k: len(wanted & set(parse_qsl(urlsplit(self.entries[k]["url"]).query,
+                                                                            keep_blank_values=True))))
+            return self.entries[best]
+
+    def load_body(self, digest):
+        with open(self.body_path(digest), "rb") as f:
+            return f.read()
+
+    def save(self):
+        with self.lock:
+            self.save_locked()
+
+    def save_locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.index_path)
+        self.unsaved = 0
+
+
+class Throttle:
+    """One shared link: every write reserves its share of the bandwidth in turn."""
+
+    def __init__(self, kbit_per_sec):
+        self.bytes_per_sec = kbit_per_sec * 1000 / 8
+        self.next_free = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self, size):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_free)
+            self.next_free = start + size / self.bytes_per_sec
+            delay = self.next_free - now
+        time.sleep(delay)
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    scheme = "http"
+    tunnel_host = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_CONNECT(self):
+        proxy = self.server.proxy
+        if proxy.tls_context is None:
+            if proxy.mode == "record":
+                self.tunnel()
+            else:
+                self.send_error(502, "HTTPS replay needs openssl to create the proxy certificate")
+            return
+        self.send_response_only(200, "Connection Established")
+        self.end_headers()
+        self.wfile.flush()
+        try:
+            connection = proxy.tls_context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError):
+            self.close_connection = True
+            return
+        # Keep serving requests from inside the TLS stream on this handler.
+        self.connection = connection
+        self.rfile = connection.makefile("rb")
+        self.wfile = connection.makefile("wb")
+        self.scheme = "https"
+        self.tunnel_host = self.path
+        self.close_connection = False
+
+    def tunnel(self):
+        host, _, port = self.path.rpartition(":")
+        try:
+            upstream = socket.create_connection((host, int(port)), timeout=UPSTREAM_TIMEOUT)
+        except (OSError, ValueError):
+            self.send_error(502)
+            return
+        self.send_response_only(200, "Connection Established")
+        self.end_headers()
+        self.wfile.flush()
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, broken = select.select(sockets, [], sockets, UPSTREAM_TIMEOUT)
+                if broken or not readable:
+                    break
+                for sock in readable:
+                    data = sock.recv(CHUNK_SIZE)
+                    if not data:
+                        return
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
+            self.close_connection = True
+
+    def request_url(self):
+        if self.path.startswith(("http://", "https://")):
+            return self.path
+        host = self.headers.get("Host") or self.tunnel_host
+        return f"{self.scheme}://{host}{self.path}"
+
+    def handle_request(self):
+        proxy = self.server.proxy
+        url = self.request_url()
+        length = int(self.headers.get("Content-Length") or 0)
+        request_body = self.rfile.read(length) if length else b""
+        if proxy.mode == "replay":
+            entry = proxy.archive.lookup(self.command, url, request_body)
+            if entry is None:
+                proxy.count("misses")
+                self.send_error(404, "Not in replay archive")
+                return
+            proxy.count("hits")
+            if proxy.latency_ms:
+                time.sleep(proxy.latency_ms / 1000)
+            self.send_entry(entry["status"], entry["reason"], entry["headers"],
+                            proxy.archive.load_body(entry["body"]), proxy.throttle)
+            return
+        try:
+            status, reason, headers, body = self.fetch(url, request_body)
+        except (OSError, http.client.HTTPException) as e:
+            proxy.count("errors")
+            self.send_error(502, str(e))
+            return
+        proxy.archive.record(self.command, url, request_body, status, reason, headers, body)
+        proxy.count("recorded")
+        self.send_entry(status, reason, headers, body)
+
+    def fetch(self, url, request_body):
+        parts = urlsplit(url)
+        if parts.scheme == "https":
+            connection = http.client.HTTPSConnection(parts.hostname, parts.port, timeout=UPSTREAM_TIMEOUT,
+                                                     context=ssl.create_default_context())
+        else:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=UPSTREAM_TIMEOUT)
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP}
+        try:
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            connection.request(self.command, target, request_body or None, headers)
+            response = connection.getresponse()
+            body = response.read()
+        finally:
+            connection.close()
+        kept = [[k, v] for k, v in response.getheaders() if k.lower() not in HOP_BY_HOP and k.lower() != "content-length"]
+        return response.status, response.reason, kept, body
+
+    def send_entry(self, status, reason, headers, body, throttle=None):
+        self.send_response_only(status, reason)
+        for name, value in headers:
+            self.send_header(name, value)
+        no_body = self.command == "HEAD" or status in (204, 304) or 100 <= status < 200
+        if not no_body:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if no_body:
+            return
+        if throttle is None:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), CHUNK_SIZE):
+            chunk = body[start:start + CHUNK_SIZE]
+            throttle.wait(len(chunk))
+            self.wfile.write(chunk)
+            self.wfile.flush()
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = handle_request
+
+
+class ReplayProxy:
+    def __init__(self, root, mode, latency_ms=0, bandwidth_kbit=0, port=0):
+        os.makedirs(root, exist_ok=True)
+        self.mode = mode
+        self.archive = ReplayArchive(root)
+        self.latency_ms = latency_ms
+        self.throttle = Throttle(bandwidth_kbit) if bandwidth_kbit else None
+        self.tls_context = ensure_certificate(root)
+        if self.tls_context is None:
+            print("replay proxy: openssl not found, HTTPS will not be recorded", file=sys.stderr)
+        self.stats = {"recorded": 0, "hits": 0, "misses": 0, "errors": 0}
+        self.stats_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self.thread = None
+
+    @property
+    def address(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def chromium_flags(self):
+        # <-loopback> also sends localhost test servers through the proxy.
+        return [f"--proxy-server={self.address}", "--proxy-bypass-list=<-loopback>", "--ignore-certificate-errors"]
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="hao-replay-proxy", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.archive.save()
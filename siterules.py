@@ -0,0 +1,113 @@
+import os
+import json
+
+# Per-site content rules. Patterns are either an exact host ("example.com") or
+# a wildcard that also covers every subdomain ("*.example.com"); "*" is the
+# catch-all. Rules are stored in a dict keyed by pattern, so a lookup walks
+# the labels of the host (a handful of dict probes) instead of scanning rules.
+
+RULE_KEYS = ("images", "javascript", "plugins", "autoplay")
+DATA_SAVER_RULE = {"images": False, "plugins": False, "autoplay": False}
+
+
+def candidate_patterns(host):
+    """Patterns that could match host, most specific first."""
+    host = host.lower().rstrip(".")
+    yield host
+    labels = host.split(".")
+    for i in range(len(labels)):
+        yield "*." + ".".join(labels[i:])
+    yield "*"
+
+
+class SiteRules:
+    def __init__(self, path):
+        self.path = path
+        self.rules = {}  # pattern -> {images, javascript, plugins, autoplay}
+        self.savings = {}  # host -> {requests, bytes}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.rules = data.get("rules", {})
+            self.savings = data.get("savings", {})
+        except Exception:
+            self.rules = {}
+            self.savings = {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"rules": self.rules, "savings": self.savings}, f)
+        except Exception:
+            pass
+
+    def set_rule(self, pattern, rule):
+        self.rules[pattern.strip().lower()] = {k: bool(rule[k]) for k in RULE_KEYS if k in rule}
+        self.save()
+
+    def remove_rule(self, pattern):
+        if self.rules.pop(pattern, None) is not None:
+            self.save()
+
+    def lookup(self, host):
+        for pattern in candidate_patterns(host):
+            if pattern in self.rules:
+                return self.rules[pattern]
+        return {}
+
+    def effective(self, host, data_saver=False, defaults=None):
+        """Return the full set of RULE_KEYS flags (True = allowed) for host.
+
+        Keys no rule sets fall back to Data Saver, then to defaults.
+        """
+        rule = self.lookup(host) if host else {}
+        base = dict(defaults or {})
+        if data_saver:
+            base.update(DATA_SAVER_RULE)
+        return {k: rule.get(k, base.get(k, True)) for k in RULE_KEYS}
+
+    def add_savings(self, host, requests, size):
+        entry = self.savings.setdefault(host, {"requests": 0, "bytes": 0})
+        entry["requests"] += requests
+        entry["bytes"] += size
+
+
+class SiteZoom:
+    """Per-host zoom levels (percent), looked up by exact host in one dict probe."""
+
+    def __init__(self, path):
+        self.path = path
+        self.levels = {}  # host -> percent
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.levels = {host: int(level) for host, level in json.load(f).items()}
+        except Exception:
+            self.levels = {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.levels, f)
+        except Exception:
+            pass
+
+    def get(self, host, default):
+        return self.levels.get(host.lower().rstrip("."), default) if host else default
+
+    def set(self, host, level, default):
+        """Remember level for host; a level equal to default just drops the entry."""
+        host = host.lower().rstrip(".")
+        if level == default:
+            if self.levels.pop(host, None) is None:
+                return
+        else:
+            self.levels[host] = level
+        self.save()
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+
+# Detects GUI-thread stalls. A Qt timer on the main thread calls beat() every
+# HEARTBEAT_MS; a background thread notices when beats stop arriving and samples
+# the main thread's Python stack through sys._current_frames() until the loop
+# recovers. The stall is logged when the late beat finally fires.
+
+HEARTBEAT_MS = 100
+THRESHOLD_MS = 250
+SAMPLE_MS = 50
+HISTOGRAM_BUCKETS_MS = [250, 500, 1000, 2000, 5000, 10000]
+SUMMARY_EVERY = 20
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+
+class StallWatchdog:
+    def __init__(self, log_path, threshold_ms=THRESHOLD_MS, heartbeat_ms=HEARTBEAT_MS):
+        self.threshold = threshold_ms / 1000.0
+        self.heartbeat = heartbeat_ms / 1000.0
+        self.main_thread_id = threading.get_ident()
+        self.lock = threading.Lock()
+        self.last_beat = time.monotonic()
+        self.samples = Counter()
+        self.histogram = Counter()
+        self.stall_count = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="hao-stall-watchdog", daemon=True)
+        self.logger = logging.getLogger("hao.stalls")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        try:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(handler)
+        except Exception:
+            self.logger.addHandler(logging.NullHandler())
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.write_summary()
+
+    def beat(self):
+        """Called from the GUI thread by a repeating timer."""
+        now = time.monotonic()
+        with self.lock:
+            stalled = now - self.last_beat - self.heartbeat
+            self.last_beat = now
+            samples, self.samples = self.samples, Counter()
+        if stalled >= self.threshold:
+            self.record(stalled * 1000, samples)
+
+    def run(self):
+        while not self.stopped.wait(SAMPLE_MS / 1000.0):
+            with self.lock:
+                if time.monotonic() - self.last_beat - self.heartbeat < self.threshold:
+                    continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            with self.lock:
+                self.samples[stack] += 1
+
+    def record(self, duration_ms, samples):
+        self.stall_count += 1
+        bucket = next((b for b in HISTOGRAM_BUCKETS_MS if duration_ms < b), None)
+        self.histogram[bucket] += 1
+        total = sum(samples.values())
+        lines = [f"stall {duration_ms:.0f} ms, {total} stack samples"]
+        for stack, count in samples.most_common(3):
+            lines.append(f"--- {count}/{total} samples:")
+            lines.append(stack.rstrip())
+        self.logger.info("\n".join(lines))
+        if self.stall_count % SUMMARY_EVERY == 0:
+            self.write_summary()
+
+    def summary(self):
+        """Return (label, count) pairs for the stall-duration histogram."""
+        rows = []
+        lower = 0
+        for bucket in HISTOGRAM_BUCKETS_MS:
+            rows.append((f"{lower}-{bucket} ms", self.histogram.get(bucket, 0)))
+            lower = bucket
+        rows.append((f">= {lower} ms", self.histogram.get(None, 0)))
+        return rows
+
+    def write_summary(self):
+        if not self.stall_count:
+            return
+        lines = [f"summary: {self.stall_count} stalls"]
+        lines += [f"  {label:>14}: {count}" for label, count in self.summary()]
+        self.logger.info("\n".join(lines))
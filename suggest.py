@@ -0,0 +1,136 @@
+import json
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QTimer, QUrl, pyqtSignal
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+
+# Search suggestions for the address bar. Keystrokes are debounced, only the
+# newest query is kept in flight (older replies are aborted), a query that is
+# already in flight is not sent twice, and answers are kept in a small LRU
+# cache with a TTL so editing back over a prefix is served locally. All the
+# endpoints speak the OpenSearch suggestions format: ["query", ["a", "b"]].
+
+SUGGEST_ENDPOINTS = {
+    "Bing": "https://api.bing.com/osjson.aspx?query={}",
+    "Google": "https://suggestqueries.google.com/complete/search?client=firefox&q={}",
+    "DuckDuckGo": "https://duckduckgo.com/ac/?q={}&type=list",
+}
+DEBOUNCE_MS = 150
+TIMEOUT_MS = 3000
+CACHE_SIZE = 256
+CACHE_TTL = 300
+MAX_SUGGESTIONS = 8
+
+
+def normalize_query(text):
+    return " ".join(text.split()).lower()
+
+
+def parse_suggestions(data, limit=MAX_SUGGESTIONS):
+    """Extract the suggestion strings from an OpenSearch suggestions response."""
+    try:
+        payload = json.loads(bytes(data).decode("utf-8", "replace"))
+        items = payload[1]
+    except Exception:
+        return []
+    return [s for s in items if isinstance(s, str) and s.strip()][:limit]
+
+
+class SuggestionProvider(QObject):
+    suggestionsReady = pyqtSignal(str, list)  # query as typed, suggestions
+
+    def __init__(self, parent=None, debounce_ms=DEBOUNCE_MS, timeout_ms=TIMEOUT_MS,
+                 cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL):
+        super().__init__(parent)
+        self.manager = QNetworkAccessManager(self)
+        self.timeout_ms = timeout_ms
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache = OrderedDict()  # (endpoint, normalized query) -> (fetched at, suggestions)
+        self.in_flight = {}  # (endpoint, normalized query) -> QNetworkReply
+        self.wanted = None  # (endpoint, normalized query, query as typed)
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "aborted": 0}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.fetch)
+
+    def request(self, endpoint, text):
+        """Ask for suggestions for text; the answer arrives through suggestionsReady."""
+        query = normalize_query(text)
+        if not query:
+            self.cancel()
+            return
+        key = (endpoint, query)
+        self.wanted = (endpoint, query, text)
+        cached = self.cache_get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            self.timer.stop()
+            self.abort_stale()
+            self.suggestionsReady.emit(text, cached)
+            return
+        self.timer.start()
+
+    def cancel(self):
+        self.wanted = None
+        self.timer.stop()
+        self.abort_stale()
+
+    def cache_get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        fetched, suggestions = entry
+        if time.monotonic() - fetched > self.cache_ttl:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return suggestions
+
+    def cache_put(self, key, suggestions):
+        self.cache[key] = (time.monotonic(), suggestions)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def abort_stale(self):
+        wanted = self.wanted[:2] if self.wanted else None
+        for key, reply in list(self.in_flight.items()):
+            if key != wanted:
+                self.stats["aborted"] += 1
+                reply.abort()
+
+    def fetch(self):
+        if self.wanted is None:
+            return
+        endpoint, query, _ = self.wanted
+        key = (endpoint, query)
+        self.abort_stale()
+        if key in self.in_flight:
+            self.stats["coalesced"] += 1
+            return
+        request = QNetworkRequest(QUrl(endpoint.format(QUrl.toPercentEncoding(query).data().decode("ascii"))))
+        request.setAttribute(QNetworkRequest.FollowRedirectsAttribute, True)
+        reply = self.manager.get(request)
+        self.in_flight[key] = reply
+        self.stats["requests"] += 1
+        timeout = QTimer(reply)
+        timeout.setSingleShot(True)
+        timeout.timeout.connect(reply.abort)
+        timeout.start(self.timeout_ms)
+        reply.finished.connect(lambda: self.on_finished(key, reply))
+
+    def on_finished(self, key, reply):
+        if self.in_flight.get(key) is reply:
+            del self.in_flight[key]
+        ok = reply.error() == QNetworkReply.NoError
+        data = reply.readAll() if ok else None
+        reply.deleteLater()
+        if not ok:
+            return
+        suggestions = parse_suggestions(data)
+        self.cache_put(key, suggestions)
+        if self.wanted and self.wanted[:2] == key:
+            self.suggestionsReady.emit(self.wanted[2], suggestions)
@@ -0,0 +1,75 @@
+import os
+import json
+import argparse
+
+import pytest
+
+from conftest import wait
+
+pytest.importorskip("PyQt5.QtWebEngineWidgets", exc_type=ImportError)
+
+PAGE = b"<!doctype html><title>%s</title><body style='background:#4a8'><h1>%s</h1></body>"
+
+
+def options(output, **overrides):
+    values = dict(url_list=None, urls=[], output=str(output), format="png", concurrency=2,
+                  timeout=20.0, retries=0, width=320, height=240, settle=100)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def render(qapp, urls, opts):
+    from PyQt5.QtCore import Qt, QTimer
+    from PyQt5.QtWebEngineWidgets import QWebEngineView
+    import headless
+
+    def create_view():
+        view = QWebEngineView()
+        view.setAttribute(Qt.WA_DontShowOnScreen, True)
+        view.show()
+        return view
+
+    service = headless.RenderService(urls, opts, create_view)
+    result = []
+    service.finished.connect(result.append)
+    QTimer.singleShot(0, service.start)
+    for _ in range(600):
+        if result:
+            break
+        wait(qapp, 100)
+    assert result, "render service did not finish"
+    with open(os.path.join(opts.output, "manifest.json"), "r", encoding="utf-8") as f:
+        return result[0], json.load(f)
+
+
+def test_parse_args_and_output_name():
+    import headless
+    opts = headless.parse_args(["--headless-render", "urls.txt", "--url", "http://a", "--format", "pdf", "--record", "x"])
+    assert opts.url_list == "urls.txt"
+    assert opts.urls == ["http://a"]
+    assert headless.parse_args(["--headless-render=urls.txt"]).url_list == "urls.txt"
+    assert headless.parse_args(["--record", "x"]).url_list is None
+    assert headless.output_name(3, "http://www.example.com/x", "pdf") == "0003-www.example.com.pdf"
+
+
+def test_render_two_pages(qapp, http_server, tmp_path):
+    server = http_server(lambda path: (200, "text/html", PAGE % (path.encode(), path.encode())))
+    urls = [server.url + "/one", server.url + "/two"]
+    code, manifest = render(qapp, urls, options(tmp_path / "out"))
+    assert code == 0
+    assert manifest["ok"] == 2 and manifest["failed"] == 0
+    assert [job["url"] for job in manifest["jobs"]] == urls
+    for job in manifest["jobs"]:
+        assert job["status"] == "ok"
+        assert job["load_ms"] is not None and job["total_ms"] is not None
+        assert os.path.getsize(job["output"]) > 0
+    assert sorted(server.requests)[:2] == ["/one", "/two"]
+
+
+def test_failed_page_is_retried_and_reported(qapp, tmp_path):
+    code, manifest = render(qapp, ["http://127.0.0.1:9/unreachable"], options(tmp_path / "out", retries=1))
+    assert code == 1
+    job = manifest["jobs"][0]
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"]
@@ -0,0 +1,105 @@
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from replayproxy import ReplayArchive, ReplayProxy, Throttle
+
+
+@pytest.fixture(autouse=True)
+def no_proxy_bypass(monkeypatch):
+    # urllib skips the proxy for hosts listed in no_proxy, which often covers 127.0.0.1.
+    for name in ("no_proxy", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def proxies():
+    started = []
+
+    def start(root, mode, **kwargs):
+        proxy = ReplayProxy(str(root), mode, **kwargs)
+        proxy.start()
+        started.append(proxy)
+        return proxy
+
+    yield start
+    for proxy in started:
+        proxy.stop()  # a second stop() after the test's own is harmless
+
+
+def get(proxy, url):
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy.address}))
+    with opener.open(url, timeout=10) as response:
+        return response.status, response.headers.get("Content-Type"), response.read()
+
+
+def test_record_then_replay(http_server, proxies, tmp_path):
+    server = http_server(lambda path: (200, "text/plain", f"body of {path}".encode()))
+    url = server.url + "/page?a=1"
+    recorder = proxies(tmp_path, "record")
+    assert get(recorder, url) == (200, "text/plain", b"body of /page?a=1")
+    recorder.stop()  # writes index.json
+    assert recorder.stats["recorded"] == 1
+    server.close()  # replay must not need the origin
+
+    replayer = proxies(tmp_path, "replay")
+    assert get(replayer, url) == (200, "text/plain", b"body of /page?a=1")
+    assert replayer.stats["hits"] == 1
+    assert server.requests == ["/page?a=1"]
+
+
+def test_lookup_prefers_the_most_shared_query_parameters(tmp_path):
+    archive = ReplayArchive(str(tmp_path))
+    archive.record("GET", "http://h/p?a=1&b=2", b"", 200, "OK", [], b"first")
+    archive.record("GET", "http://h/p?a=9&c=3", b"", 200, "OK", [], b"second")
+    archive.record("POST", "http://h/p?a=1", b"form", 200, "OK", [], b"posted")
+    archive.save()
+
+    archive = ReplayArchive(str(tmp_path))  # the fuzzy index is rebuilt from index.json
+    body = lambda entry: archive.load_body(entry["body"])
+    assert body(archive.lookup("GET", "http://h/p?a=1&b=2")) == b"first"
+    assert body(archive.lookup("GET", "http://h/p?b=2&a=1&cachebust=123")) == b"first"
+    assert body(archive.lookup("GET", "http://h/p?c=3")) == b"second"
+    assert body(archive.lookup("POST", "http://h/p?a=1", b"form")) == b"posted"
+    assert archive.lookup("GET", "http://h/other?a=1") is None
+    assert archive.lookup("GET", "http://other/p?a=1") is None
+
+
+def test_replay_miss_is_a_404(proxies, tmp_path):
+    replayer = proxies(tmp_path, "replay")
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(replayer, "http://127.0.0.1:9/never-recorded")
+    assert error.value.code == 404
+    assert replayer.stats == {"recorded": 0, "hits": 0, "misses": 1, "errors": 0}
+
+
+def test_throttle_shares_one_link():
+    throttle = Throttle(800)  # 100 000 bytes/s
+    start = time.monotonic()
+    throttle.wait(20000)
+    throttle.wait(20000)
+    assert 0.35 <= time.monotonic() - start < 1.5
+
+
+def test_replay_applies_latency_and_bandwidth(http_server, proxies, tmp_path):
+    payload = b"x" * 50000
+    server = http_server(lambda path: (200, "application/octet-stream", payload))
+    url = server.url + "/blob"
+    recorder = proxies(tmp_path, "record")
+    get(recorder, url)
+    recorder.stop()
+
+    fast = proxies(tmp_path, "replay")
+    start = time.monotonic()
+    assert get(fast, url)[2] == payload
+    unthrottled = time.monotonic() - start
+
+    # 300 ms latency plus 50 000 bytes at 800 kbit/s (100 000 bytes/s).
+    slow = proxies(tmp_path, "replay", latency_ms=300, bandwidth_kbit=800)
+    start = time.monotonic()
+    assert get(slow, url)[2] == payload
+    elapsed = time.monotonic() - start
+    assert elapsed >= 0.75
+    assert elapsed > unthrottled + 0.5
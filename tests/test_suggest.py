@@ -0,0 +1,103 @@
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from conftest import wait, json_body
+
+from suggest import SuggestionProvider, normalize_query, parse_suggestions
+
+
+def suggestion_server(http_server, delay=0.0):
+    def handler(path):
+        query = parse_qs(urlsplit(path).query)["q"][0]
+        if delay:
+            time.sleep(delay)
+        return 200, "application/x-suggestions+json", json_body([query, [query + " one", query + " two"]])
+    server = http_server(handler)
+    server.endpoint = server.url + "/suggest?q={}"
+    return server
+
+
+def queries(server):
+    return [parse_qs(urlsplit(path).query)["q"][0] for path in server.requests]
+
+
+def collect(provider):
+    results = []
+    provider.suggestionsReady.connect(lambda query, suggestions: results.append((query, suggestions)))
+    return results
+
+
+def test_parse_and_normalize():
+    assert parse_suggestions(b'["ab", ["ab c", "", 3, "ab d"]]') == ["ab c", "ab d"]
+    assert parse_suggestions(b"not json") == []
+    assert normalize_query("  Hello   World ") == "hello world"
+
+
+def test_debounce_sends_only_the_last_query(qapp, http_server):
+    server = suggestion_server(http_server)
+    provider = SuggestionProvider(debounce_ms=100)
+    results = collect(provider)
+    for text in ["h", "he", "hel", "hell", "hello"]:
+        provider.request(server.endpoint, text)
+    wait(qapp, 600)
+    assert queries(server) == ["hello"]
+    assert results == [("hello", ["hello one", "hello two"])]
+
+
+def test_cache_serves_repeated_queries_locally(qapp, http_server):
+    server = suggestion_server(http_server)
+    provider = SuggestionProvider(debounce_ms=10)
+    results = collect(provider)
+    provider.request(server.endpoint, "cats")
+    wait(qapp, 400)
+    provider.request(server.endpoint, "  CATS ")
+    assert results[-1] == ("  CATS ", ["cats one", "cats two"])
+    assert provider.stats["cache_hits"] == 1
+    assert queries(server) == ["cats"]
+
+
+def test_cache_entries_expire(qapp, http_server):
+    server = suggestion_server(http_server)
+    provider = SuggestionProvider(debounce_ms=10, cache_ttl=0.2)
+    provider.request(server.endpoint, "dogs")
+    wait(qapp, 300)
+    provider.request(server.endpoint, "dogs")
+    wait(qapp, 300)
+    assert queries(server) == ["dogs", "dogs"]
+    assert provider.stats["cache_hits"] == 0
+
+
+def test_cache_is_lru_bounded(qapp, http_server):
+    server = suggestion_server(http_server)
+    provider = SuggestionProvider(debounce_ms=10, cache_size=2)
+    for text in ["a1", "a2", "a3"]:
+        provider.request(server.endpoint, text)
+        wait(qapp, 300)
+    assert [query for _, query in provider.cache] == ["a2", "a3"]
+
+
+def test_identical_query_in_flight_is_coalesced(qapp, http_server):
+    server = suggestion_server(http_server, delay=0.5)
+    provider = SuggestionProvider(debounce_ms=20)
+    results = collect(provider)
+    provider.request(server.endpoint, "abc")
+    wait(qapp, 100)  # "abc" is now in flight
+    provider.request(server.endpoint, "abcd")
+    provider.request(server.endpoint, "abc")
+    wait(qapp, 1000)
+    assert queries(server) == ["abc"]
+    assert provider.stats["coalesced"] == 1
+    assert results == [("abc", ["abc one", "abc two"])]
+
+
+def test_stale_request_is_aborted(qapp, http_server):
+    server = suggestion_server(http_server, delay=0.4)
+    provider = SuggestionProvider(debounce_ms=20)
+    results = collect(provider)
+    provider.request(server.endpoint, "slow")
+    wait(qapp, 100)  # "slow" is now in flight
+    provider.request(server.endpoint, "fast")
+    wait(qapp, 1200)
+    assert provider.stats["aborted"] == 1
+    assert results == [("fast", ["fast one", "fast two"])]
+    assert (server.endpoint, "slow") not in provider.cache
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import secrets
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+# User scripts use the Greasemonkey metadata block:
+#
+#   // ==UserScript==
+#   // @name     Example fix
+#   // @match    *://*.example.com/*
+#   // @run-at   document-end
+#   // ==/UserScript==
+#
+# Every script is compiled once into a QWebEngineScript on the profile's script
+# collection, so opening a tab costs nothing extra. The injected wrapper checks
+# the URL patterns, times the script body and reports back through a console
+# message that CustomWebEnginePage hands to UserScriptManager.report().
+#
+# Reports go through a copy of console.debug captured at document creation,
+# before any page script runs, and stored under a random, read-only window
+# property; each message carries a secret token chosen per browser session.
+# A page can neither silence the reports by replacing console.debug nor forge
+# them, since the token never passes through anything the page can observe.
+
+SCRIPT_SUFFIX = ".js"
+REPORT_PREFIX = "__hao_userscript__:"
+RUN_AT = {
+    "document-start": QWebEngineScript.DocumentCreation,
+    "document-end": QWebEngineScript.DocumentReady,
+    "document-idle": QWebEngineScript.Deferred,
+}
+METADATA_RE = re.compile(r"//\s*==UserScript==(.*?)//\s*==/UserScript==", re.S)
+KEY_RE = re.compile(r"^\s*//\s*@(\S+)(?:\s+(.*?))?\s*$")
+
+REPORTER = """(function() {
+var debug = console.debug.bind(console);
+Object.defineProperty(window, %(name)s, {value: function(message) { debug(message); }});
+})();"""
+
+WRAPPER = """(function() {
+var report = window[%(reporter)s] || function() {};
+var href = location.href;
+var include = [%(include)s], exclude = [%(exclude)s];
+if (include.length && !include.some(function(r) { return r.test(href); })) return;
+if (exclude.some(function(r) { return r.test(href); })) return;
+var started = performance.now();
+try {
+%(source)s
+} catch (e) { console.error(e); }
+report(%(prefix)s + JSON.stringify({id: %(id)s, ms: performance.now() - started}));
+})();"""
+
+
+def parse_metadata(source):
+    """Return a dict of metadata key -> list of values."""
+    meta = {}
+    block = METADATA_RE.search(source)
+    if block:
+        for line in block.group(1).splitlines():
+            m = KEY_RE.match(line)
+            if m:
+                meta.setdefault(m.group(1), []).append(m.group(2) or "")
+    return meta
+
+
+def match_pattern_to_regex(pattern):
+    """Convert a @match pattern (scheme://host/path) into a regular expression."""
+    if pattern == "<all_urls>":
+        return r"^(https?|file|ftp)://"
+    m = re.match(r"^(\*|[a-z-]+)://([^/]*)(/.*)?$", pattern)
+    if not m:
+        return None
+    scheme, host, path = m.groups()
+    scheme_re = "https?" if scheme == "*" else re.escape(scheme)
+    if host == "*":
+        host_re = "[^/]*"
+    elif host.startswith("*."):
+        host_re = r"([^/]*\.)?" + re.escape(host[2:])
+    else:
+        host_re = re.escape(host)
+    path_re = ".*".join(re.escape(p) for p in (path or "/*").split("*"))
+    return "^" + scheme_re + "://" + host_re + r"(:\d+)?" + path_re + "$"
+
+
+def glob_to_regex(pattern):
+    """Convert an @include/@exclude glob (or /regex/) into a regular expression."""
+    if len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+        return pattern[1:-1]
+    return "^" + ".*".join(re.escape(p) for p in pattern.split("*")) + "$"
+
+
+def build_script(script_id, source, prefix=REPORT_PREFIX, reporter=""):
+    meta = parse_metadata(source)
+    include = [match_pattern_to_regex(p) for p in meta.get("match", [])]
+    include += [glob_to_regex(p) for p in meta.get("include", [])]
+    exclude = [match_pattern_to_regex(p) for p in meta.get("exclude-match", [])]
+    exclude += [glob_to_regex(p) for p in meta.get("exclude", [])]
+    to_js = lambda regexes: ", ".join(f"new RegExp({json.dumps(r)})" for r in regexes if r)
+    script = QWebEngineScript()
+    script.setName("userscript:" + script_id)
+    script.setSourceCode(WRAPPER % {
+        "include": to_js(include),
+        "exclude": to_js(exclude),
+        "source": source,
+        "prefix": json.dumps(prefix),
+        "reporter": json.dumps(reporter),
+        "id": json.dumps(script_id),
+    })
+    run_at = (meta.get("run-at") or ["document-end"])[-1]
+    script.setInjectionPoint(RUN_AT.get(run_at, QWebEngineScript.DocumentReady))
+    script.setWorldId(QWebEngineScript.MainWorld)
+    script.setRunsOnSubFrames("noframes" not in meta)
+    name = (meta.get("name") or [script_id])[-1]
+    return name, script
+
+
+class UserScriptManager(QObject):
+    def __init__(self, profile, directory, parent=None):
+        super().__init__(parent)
+        self.collection = profile.scripts()
+        self.directory = directory
+        self.prefix = f"{REPORT_PREFIX}{secrets.token_hex(16)}:"
+        self.reporter = "__hao_report_" + secrets.token_hex(8)
+        reporter = QWebEngineScript()
+        reporter.setName("userscript-reporter")
+        reporter.setSourceCode(REPORTER % {"name": json.dumps(self.reporter)})
+        reporter.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        reporter.setWorldId(QWebEngineScript.MainWorld)
+        reporter.setRunsOnSubFrames(True)
+        self.collection.insert(reporter)
+        self.scripts = {}  # script id -> {mtime, name, script}
+        self.stats = {}  # script id -> {injections, total_ms, max_ms}
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.reload)
+        self.watcher.fileChanged.connect(self.reload)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.watcher.addPath(directory)
+        except Exception:
+            pass
+        self.reload()
+
+    def reload(self, *_):
+        """Re-register only the scripts that were added, changed or removed."""
+        seen = set()
+        try:
+            names = sorted(f for f in os.listdir(self.directory) if f.endswith(SCRIPT_SUFFIX))
+        except Exception:
+            names = []
+        for script_id in names:
+            path = os.path.join(self.directory, script_id)
+            try:
+                mtime = os.path.getmtime(path)
+                seen.add(script_id)
+                current = self.scripts.get(script_id)
+                if current and current["mtime"] == mtime:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    name, script = build_script(script_id, f.read(), self.prefix, self.reporter)
+            except Exception:
+                continue
+            if current:
+                self.collection.remove(current["script"])
+            self.collection.insert(script)
+            self.scripts[script_id] = {"mtime": mtime, "name": name, "script": script}
+            if path not in self.watcher.files():
+                self.watcher.addPath(path)
+        for script_id in set(self.scripts) - seen:
+            self.collection.remove(self.scripts.pop(script_id)["script"])
+
+    def report(self, message):
+        """Record a console message from the wrapper; return True if it was one."""
+        if not message.startswith(self.prefix):
+            return False
+        try:
+            data = json.loads(message[len(self.prefix):])
+            ms = float(data["ms"])
+            stat = self.stats.setdefault(data["id"], {"injections": 0, "total_ms": 0.0, "max_ms": 0.0})
+        except Exception:
+            return True
+        stat["injections"] += 1
+        stat["total_ms"] += ms
+        stat["max_ms"] = max(stat["max_ms"], ms)
+        return True
+
+    def summary(self):
+        """Return (script id, name, injections, total ms, max ms), slowest first."""
+        rows = []
+        for script_id, entry in self.scripts.items():
+            stat = self.stats.get(script_id, {"injections": 0, "total_ms": 0.0, "max_ms": 0.0})
+            rows.append((script_id, entry["name"], stat["injections"], stat["total_ms"], stat["max_ms"]))
+        return sorted(rows, key=lambda r: -r[3])
@@ -0,0 +1,213 @@
+import itertools
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QMimeData, pyqtSignal
+from PyQt5.QtWidgets import QTreeView, QAbstractItemView, QMenu
+
+# Vertical tab sidebar. Tabs live in a tree model (tabs opened from a page
+# through createWindow become children of that page's tab) shown in a
+# QTreeView with uniform row heights, so only the visible rows are laid out
+# and painted no matter how many tabs are open. Row data is read straight
+# from the views, which keeps title and icon updates O(1).
+
+MIME_TYPE = "application/x-hao-tab"
+_ids = itertools.count(1)
+
+
+class TabNode:
+    __slots__ = ("id", "view", "parent", "children")
+
+    def __init__(self, view=None, parent=None):
+        self.id = next(_ids)
+        self.view = view
+        self.parent = parent
+        self.children = []
+
+    def row(self):
+        return self.parent.children.index(self) if self.parent else 0
+
+    def contains(self, other):
+        while other is not None:
+            if other is self:
+                return True
+            other = other.parent
+        return False
+
+
+class TabTreeModel(QAbstractItemModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = TabNode()
+        self.nodes = {}  # view -> TabNode
+        self.nodes_by_id = {}
+
+    # --- QAbstractItemModel interface ---
+    def index(self, row, column, parent=QModelIndex()):
+        node = parent.internalPointer() if parent.isValid() else self.root
+        if column != 0 or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row(), 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = parent.internalPointer() if parent.isValid() else self.root
+        return len(node.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        view = index.internalPointer().view
+        if role == Qt.DisplayRole:
+            return view.title() or view.url().toString() or "New Tab"
+        if role == Qt.DecorationRole:
+            return view.icon()
+        if role == Qt.ToolTipRole:
+            return f"{view.title()}\n{view.url().toString()}"
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsDropEnabled
+        if index.isValid():
+            flags |= Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+        return flags
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        return [MIME_TYPE]
+
+    def mimeData(self, indexes):
+        data = QMimeData()
+        if indexes:
+            data.setData(MIME_TYPE, str(indexes[0].internalPointer().id).encode("ascii"))
+        return data
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action != Qt.MoveAction or not data.hasFormat(MIME_TYPE):
+            return False
+        node = self.nodes_by_id.get(int(bytes(data.data(MIME_TYPE)).decode("ascii")))
+        target = parent.internalPointer() if parent.isValid() else self.root
+        if node is None or node.contains(target):
+            return False
+        self.move_node(node, target, row if row >= 0 else len(target.children))
+        # The node has been moved already; removeRows() is left unimplemented so
+        # the view's follow-up removal of the dragged row is a no-op.
+        return True
+
+    # --- Tab bookkeeping ---
+    def index_for(self, view):
+        node = self.nodes.get(view)
+        if node is None:
+            return QModelIndex()
+        return self.createIndex(node.row(), 0, node)
+
+    def add_tab(self, view, opener=None):
+        parent = self.nodes.get(opener, self.root)
+        node = TabNode(view, parent)
+        row = len(parent.children)
+        parent_index = self.index_for(opener) if parent is not self.root else QModelIndex()
+        self.beginInsertRows(parent_index, row, row)
+        parent.children.append(node)
+        self.nodes[view] = node
+        self.nodes_by_id[node.id] = node
+        self.endInsertRows()
+        return self.createIndex(row, 0, node)
+
+    def remove_tab(self, view):
+        node = self.nodes.get(view)
+        if node is None:
+            return
+        # Children move up to take the closed tab's place.
+        for i, child in enumerate(list(node.children)):
+            self.move_node(child, node.parent, node.row() + 1 + i)
+        row = node.row()
+        parent_index = self.index_for(node.parent.view) if node.parent is not self.root else QModelIndex()
+        self.beginRemoveRows(parent_index, row, row)
+        node.parent.children.pop(row)
+        self.endRemoveRows()
+        del self.nodes[view]
+        del self.nodes_by_id[node.id]
+
+    def move_node(self, node, target, row):
+        old_parent = node.parent
+        old_row = node.row()
+        if old_parent is target and row in (old_row, old_row + 1):
+            return
+        source_index = self.index_for(old_parent.view) if old_parent is not self.root else QModelIndex()
+        target_index = self.index_for(target.view) if target is not self.root else QModelIndex()
+        if not self.beginMoveRows(source_index, old_row, old_row, target_index, row):
+            return
+        old_parent.children.pop(old_row)
+        if old_parent is target and row > old_row:
+            row -= 1
+        target.children.insert(row, node)
+        node.parent = target
+        self.endMoveRows()
+
+    def refresh(self, view):
+        index = self.index_for(view)
+        if index.isValid():
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.DecorationRole, Qt.ToolTipRole])
+
+
+class VerticalTabStrip(QTreeView):
+    tabActivated = pyqtSignal(object)
+    tabCloseRequested = pyqtSignal(object)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(True)
+        self.setAnimated(False)
+        self.setIndentation(14)
+        self.setExpandsOnDoubleClick(False)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setDragDropMode(QAbstractItemView.InternalMove)
+        self.setDefaultDropAction(Qt.MoveAction)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.setMinimumWidth(180)
+        self.setMaximumWidth(320)
+        self.clicked.connect(lambda index: self.tabActivated.emit(index.internalPointer().view))
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        model.rowsInserted.connect(self.expand_parent)
+
+    def expand_parent(self, parent, first, last):
+        if parent.isValid():
+            self.expand(parent)
+
+    def select_view(self, view):
+        index = self.model().index_for(view)
+        if index.isValid():
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            index = self.indexAt(event.pos())
+            if index.isValid():
+                self.tabCloseRequested.emit(index.internalPointer().view)
+                return
+        super().mouseReleaseEvent(event)
+
+    def show_context_menu(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+        view = index.internalPointer().view
+        menu = QMenu(self)
+        menu.addAction("Close Tab", lambda: self.tabCloseRequested.emit(view))
+        menu.exec_(self.viewport().mapToGlobal(pos))